@@ -1,8 +1,18 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Location, Post
+from .jobs import enqueue_image_job
+from .models import Category, Comment, ImageJob, Location, Post
 
 admin.site.register(Category)
 admin.site.register(Comment)
+admin.site.register(ImageJob)
 admin.site.register(Location)
-admin.site.register(Post)
+
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if 'image' in form.changed_data:
+            enqueue_image_job(obj)
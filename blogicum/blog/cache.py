@@ -0,0 +1,141 @@
+import time
+from functools import partial, wraps
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+
+from .routers import REPLICA, feed_alias
+from .scheduling import seconds_until_next_publication
+
+
+POST_CARDS = 'post_cards'
+FEEDS = 'feeds'
+CATEGORIES = 'categories'
+LOCATIONS = 'locations'
+POST = 'post:{post_id}'
+
+# Кэши, у каждого процесса свои: сигнал о записи сбрасывает
+# поколение только в процессе, который эту запись сделал.
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+def _version_key(name):
+    return f'blog:version:{name}'
+
+
+def _new_version():
+    # Не с единицы: после очистки или вытеснения ключа поколение
+    # не должно совпасть с тем, под которым уже что-то закэшировано.
+    return time.time_ns()
+
+
+def get_version(name):
+    """Текущее поколение кэша с именем name."""
+    version = cache.get(_version_key(name))
+    if version is None:
+        version = _new_version()
+        cache.add(_version_key(name), version, timeout=None)
+        version = cache.get(_version_key(name), version)
+    return version
+
+
+def bump_version(name):
+    """Сбрасывает кэш name, переводя его на новое поколение."""
+    try:
+        cache.incr(_version_key(name))
+    except ValueError:
+        cache.add(_version_key(name), _new_version(), timeout=None)
+
+
+def cache_is_shared():
+    """Видят ли все процессы один и тот же кэш."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def _capped_for_local_cache(timeout):
+    # С кэшем в памяти процесса сигналы сбрасывают поколение только
+    # у записавшего процесса, остальные узнают о записи по истечении срока.
+    if cache_is_shared():
+        return timeout
+    return min(timeout, settings.LOCAL_CACHE_TIMEOUT)
+
+
+def feed_cache_timeout():
+    """
+    Время жизни кэша лент.
+
+    Не дольше FEED_CACHE_TIMEOUT и не дольше момента,
+    когда станет видна ближайшая отложенная публикация.
+    С кэшем в памяти процесса — не дольше LOCAL_CACHE_TIMEOUT.
+    """
+    timeout = _capped_for_local_cache(settings.FEED_CACHE_TIMEOUT)
+    until_next = seconds_until_next_publication()
+    if until_next is not None:
+        timeout = min(timeout, until_next)
+    return int(timeout)
+
+
+def post_cache_timeout():
+    """
+    Время жизни кэша страницы поста.
+
+    С кэшем в памяти процесса другие процессы не узнают об изменении
+    поста, поэтому срок ограничен LOCAL_CACHE_TIMEOUT.
+    """
+    return _capped_for_local_cache(settings.POST_DETAIL_CACHE_TIMEOUT)
+
+
+def post_card_cache_timeout():
+    """
+    Время жизни фрагментного кэша карточки поста.
+
+    Ограничено LOCAL_CACHE_TIMEOUT по той же причине,
+    что и кэш страницы поста.
+    """
+    return _capped_for_local_cache(settings.POST_CARD_CACHE_TIMEOUT)
+
+
+def cache_anonymous_page(view=None, versions=(FEEDS,),
+                         timeout=feed_cache_timeout):
+    """
+    Кэширует страницу целиком для GET-запросов анонимов.
+
+    Ключ включает поколения кэшей versions; в именах можно
+    ссылаться на аргументы URL, например POST. Страница, собранная
+    по реплике, могла отстать от основной базы, поэтому хранится
+    не дольше REPLICA_PIN_SECONDS.
+    """
+    if view is None:
+        return partial(
+            cache_anonymous_page, versions=versions, timeout=timeout
+        )
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        path = md5(request.get_full_path().encode()).hexdigest()
+        generation = ':'.join(
+            str(get_version(name.format(**kwargs))) for name in versions
+        )
+        key = f'blog:page:{generation}:{path}'
+        response = cache.get(key)
+        if response is not None:
+            return response
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            response = response.render()
+        patch_vary_headers(response, ('Cookie',))
+        if response.status_code == 200 and not response.cookies:
+            seconds = timeout()
+            if feed_alias() == REPLICA:
+                seconds = min(seconds, settings.REPLICA_PIN_SECONDS)
+            if seconds > 0:
+                cache.set(key, response, seconds)
+        return response
+
+    return wrapper
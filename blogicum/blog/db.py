@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Настраивает новое соединение SQLite для конкурентной работы."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def close_if_unusable(connection):
+    """Закрывает отвалившееся соединение; True, если закрыл."""
+    if connection.connection is None or connection.is_usable():
+        return False
+    connection.close()
+    return True
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    # Django 3.2 проверяет соединение только после ошибки, а сервер БД
+    # или пулер мог закрыть его за время простоя. Новое соединение
+    # откроется само при первом запросе к базе.
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    for connection in connections.all():
+        if connection.settings_dict['CONN_MAX_AGE']:
+            close_if_unusable(connection)
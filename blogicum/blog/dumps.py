@@ -0,0 +1,99 @@
+import gzip
+import json
+import sys
+
+
+# Модели дампа в порядке зависимостей по внешним ключам.
+DUMP_MODELS = (
+    'auth.user',
+    'blog.category',
+    'blog.location',
+    'blog.post',
+    'blog.comment',
+)
+CHUNK_SIZE = 64 * 1024
+
+
+def open_dump(path, mode='rt'):
+    """Открывает файл дампа; .gz распаковывается на лету, '-' — stdio."""
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _iter_json_array(stream, buffer):
+    decoder = json.JSONDecoder()
+    position = buffer.index('[') + 1
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if position < len(buffer) and buffer[position] == ']':
+            return
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = stream.read(CHUNK_SIZE)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield record
+        buffer = buffer[end:]
+        position = 0
+
+
+def _iter_json_lines(stream, buffer):
+    while True:
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer += chunk
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+def iter_records(stream):
+    """
+    Лениво читает записи дампа.
+
+    Поддерживается JSON-массив в формате dumpdata и JSONL
+    (по объекту в строке); формат определяется по первому символу.
+    В памяти держится только текущая запись и непрочитанный хвост.
+    """
+    buffer = ''
+    while not buffer.strip():
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        buffer += chunk
+    if buffer.lstrip().startswith('['):
+        yield from _iter_json_array(stream, buffer)
+    else:
+        yield from _iter_json_lines(stream, buffer)
+
+
+def dump_path(directory, label, compress=False):
+    """Файл модели label в дампе, разбитом по моделям."""
+    return directory / f'{label}.jsonl{".gz" if compress else ""}'
+
+
+def _default(value):
+    # Полная точность: DjangoJSONEncoder обрезал бы микросекунды,
+    # а на них держится порядок в курсорной пагинации.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def write_record(stream, record):
+    stream.write(json.dumps(record, ensure_ascii=False, default=_default))
+    stream.write('\n')
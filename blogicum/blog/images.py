@@ -0,0 +1,149 @@
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, JpegImagePlugin
+
+from .models import PostPhoto
+
+
+# Поле PostPhoto -> ширина копии в пикселях.
+# Карточка в ленте шириной 40rem, вторая копия — для экранов 2x.
+RENDITIONS = {
+    'thumbnail': 640,
+    'medium': 1280,
+}
+JPEG_QUALITY = 82
+# Качество, с которым перекодируется оригинал, если его нужно повернуть.
+ORIGINAL_QUALITY = 95
+EXIF_ORIENTATION = 0x0112
+# Маркеры JPEG: APP1 хранит EXIF и XMP, после SOS идут сами данные.
+JPEG_APP1 = 0xE1
+JPEG_SOS = 0xDA
+
+
+def render_rendition(image, width):
+    """Уменьшает картинку до ширины width и кодирует в JPEG."""
+    if image.width > width:
+        image = image.resize(
+            (width, round(image.height * width / image.width)),
+            Image.LANCZOS
+        )
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        format='JPEG',
+        quality=JPEG_QUALITY,
+        optimize=True,
+        progressive=True
+    )
+    return ContentFile(buffer.getvalue())
+
+
+def average_color(image):
+    """Средний цвет картинки в виде #rrggbb."""
+    red, green, blue = image.resize((1, 1), Image.BOX).getpixel((0, 0))
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def strip_jpeg_exif(data):
+    """
+    Вырезает сегменты APP1 из JPEG, не перекодируя картинку.
+
+    Возвращает None, если файл не удалось разобрать.
+    """
+    if data[:2] != b'\xff\xd8':
+        return None
+    output = bytearray(data[:2])
+    position = 2
+    while position + 4 <= len(data):
+        if data[position] != 0xFF:
+            return None
+        marker = data[position + 1]
+        if marker == 0xFF:
+            position += 1
+            continue
+        if marker == JPEG_SOS:
+            output += data[position:]
+            return bytes(output)
+        length = int.from_bytes(data[position + 2:position + 4], 'big')
+        end = position + 2 + length
+        if marker != JPEG_APP1:
+            output += data[position:end]
+        position = end
+    return None
+
+
+def strip_metadata(post):
+    """
+    Удаляет EXIF из оригинала фото.
+
+    Без поворота по тегу ориентации JPEG не перекодируется: из файла
+    вырезаются сегменты с метаданными. Иначе картинка поворачивается
+    и сохраняется с высоким качеством и прежней цветовой
+    субдискретизацией. Файл без EXIF не перезаписывается.
+    """
+    with post.image.open('rb'):
+        data = post.image.read()
+    image = Image.open(BytesIO(data))
+    exif = image.getexif()
+    if not exif:
+        return
+    content = None
+    if image.format == 'JPEG' and exif.get(EXIF_ORIENTATION, 1) == 1:
+        content = strip_jpeg_exif(data)
+    if content is None:
+        options = {'quality': ORIGINAL_QUALITY}
+        if image.format == 'JPEG':
+            subsampling = JpegImagePlugin.get_sampling(image)
+            if subsampling != -1:
+                options['subsampling'] = subsampling
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        buffer = BytesIO()
+        image.save(buffer, format=image_format, **options)
+        content = buffer.getvalue()
+    storage = post.image.storage
+    name = post.image.name
+    storage.delete(name)
+    saved_name = storage.save(name, ContentFile(content))
+    if saved_name != name:
+        post.image.name = saved_name
+        type(post).objects.filter(pk=post.pk).update(image=saved_name)
+
+
+def discard_renditions(post):
+    """Удаляет устаревшие копии, пока до фото не дошла очередь."""
+    # Файлы копий удаляет сигнал post_delete у PostPhoto.
+    PostPhoto.objects.filter(post=post).delete()
+
+
+def make_renditions(post):
+    """
+    Создаёт уменьшенные копии фото поста рядом с оригиналом.
+
+    Копии перекодируются в JPEG без метаданных, старые копии удаляются.
+    Заодно сохраняются размеры и средний цвет оригинала, чтобы
+    шаблонам не приходилось открывать файл.
+    """
+    photo, _ = PostPhoto.objects.get_or_create(post=post)
+    for field_name in RENDITIONS:
+        getattr(photo, field_name).delete(save=False)
+    if post.image:
+        with post.image.open('rb'):
+            image = ImageOps.exif_transpose(Image.open(post.image))
+            image = image.convert('RGB')
+        photo.width, photo.height = image.size
+        photo.color = average_color(image)
+        original = PurePosixPath(post.image.name)
+        for field_name, width in RENDITIONS.items():
+            getattr(photo, field_name).save(
+                str(original.parent / f'{original.stem}_{width}w.jpg'),
+                render_rendition(image, width),
+                save=False
+            )
+        photo.save()
+    else:
+        photo.delete()
+    # Карточка поста в кэше привязана к updated_at.
+    post.save(update_fields=('updated_at',))
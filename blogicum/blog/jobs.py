@@ -0,0 +1,76 @@
+from django.db.models import F
+from django.utils import timezone
+
+from .images import discard_renditions, make_renditions, strip_metadata
+from .models import ImageJob, Post
+
+
+def enqueue_image_job(post):
+    """
+    Ставит фото поста в очередь на обработку.
+
+    Старые копии удаляются сразу, до готовности новых
+    шаблоны показывают оригинал.
+    """
+    discard_renditions(post)
+    ImageJob.objects.get_or_create(post=post, status=ImageJob.PENDING)
+
+
+def claim_next_job():
+    """Забирает старейшую задачу из очереди, None — если очередь пуста."""
+    while True:
+        job = ImageJob.objects.filter(status=ImageJob.PENDING).first()
+        if job is None:
+            return None
+        started_at = timezone.now()
+        claimed = ImageJob.objects.filter(
+            pk=job.pk, status=ImageJob.PENDING
+        ).update(
+            status=ImageJob.RUNNING,
+            started_at=started_at,
+            attempts=F('attempts') + 1
+        )
+        if claimed:
+            job.status = ImageJob.RUNNING
+            job.started_at = started_at
+            job.attempts += 1
+            return job
+
+
+def run_job(job, max_attempts):
+    """
+    Выполняет задачу; упавшая задача возвращается в очередь.
+
+    Задача поста, удалённого во время обработки, считается
+    выполненной: её запись удалена вместе с постом.
+    """
+    try:
+        post = job.post
+        if post.image:
+            strip_metadata(post)
+        make_renditions(post)
+    except Post.DoesNotExist:
+        status, error = ImageJob.DONE, ''
+    except Exception as exc:
+        status = (
+            ImageJob.PENDING if job.attempts < max_attempts
+            else ImageJob.FAILED
+        )
+        error = f'{type(exc).__name__}: {exc}'
+    else:
+        status, error = ImageJob.DONE, ''
+    updated = ImageJob.objects.filter(pk=job.pk).update(
+        status=status, error=error
+    )
+    if not updated:
+        status, error = ImageJob.DONE, ''
+    job.status, job.error = status, error
+    return job.status
+
+
+def requeue_stale_jobs(timeout):
+    """Возвращает в очередь задачи упавших обработчиков."""
+    return ImageJob.objects.filter(
+        status=ImageJob.RUNNING,
+        started_at__lt=timezone.now() - timeout
+    ).update(status=ImageJob.PENDING)
@@ -0,0 +1,82 @@
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.dumps import DUMP_MODELS, dump_path, open_dump, write_record
+
+
+# У пользователей выгружаются только поля, нужные для ссылок на авторов.
+USER_FIELDS = ('username', 'first_name', 'last_name')
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает категории, местоположения, публикации, '
+        'комментарии и их авторов в JSONL'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help="Файл (или каталог при --shard), '-' — stdout"
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Сжимать вывод gzip'
+        )
+        parser.add_argument(
+            '--shard', action='store_true',
+            help='Писать каждую модель в отдельный файл каталога path'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать из базы за раз'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        compress = options['gzip']
+        if path == '-' and (compress or options['shard']):
+            raise CommandError('В stdout пишется только несжатый JSONL.')
+        if not options['shard'] and compress and not path.endswith('.gz'):
+            path += '.gz'
+
+        with ExitStack() as stack:
+            if options['shard']:
+                directory = Path(path)
+                directory.mkdir(parents=True, exist_ok=True)
+            else:
+                stream = stack.enter_context(open_dump(path, 'wt'))
+            for label in DUMP_MODELS:
+                if options['shard']:
+                    stream = stack.enter_context(open_dump(
+                        dump_path(directory, label, compress), 'wt'
+                    ))
+                total = self.export_model(
+                    label, stream, options['chunk_size']
+                )
+                self.stderr.write(f'{label}: {total}')
+
+    def export_model(self, label, stream, chunk_size):
+        model = apps.get_model(label)
+        fields = [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key
+            and (label != 'auth.user' or field.name in USER_FIELDS)
+        ]
+        rows = model.objects.order_by('pk').values_list(
+            'pk', *(field.attname for field in fields)
+        ).iterator(chunk_size=chunk_size)
+        total = 0
+        for pk, *values in rows:
+            write_record(stream, {
+                'model': label,
+                'pk': pk,
+                'fields': {
+                    field.name: value for field, value in zip(fields, values)
+                },
+            })
+            total += 1
+        return total
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from blog.query_utils import fill_excerpts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает анонсы публикаций для карточек в ленте'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько публикаций обновлять одним запросом'
+        )
+
+    def handle(self, *args, **options):
+        updated = fill_excerpts(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено анонсов: {updated}')
+        )
@@ -0,0 +1,63 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from blog.images import make_renditions
+from blog.models import Post
+
+
+def _init_worker():
+    django.setup()
+
+
+def _render(post_id):
+    try:
+        make_renditions(Post.objects.get(pk=post_id))
+    except Exception as error:
+        return post_id, f'{type(error).__name__}: {error}'
+    return post_id, None
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт уменьшенные копии фото у существующих публикаций '
+        'и сохраняет их размеры'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Число процессов (по умолчанию — по числу ядер)'
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересоздать копии и у постов, где они уже есть'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(
+                Q(photo__isnull=True) | Q(photo__width__isnull=True)
+            )
+        post_ids = list(posts.values_list('pk', flat=True))
+        # Дочерние процессы не должны делить соединение с родителем.
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], initializer=_init_worker
+        ) as executor:
+            for post_id, error in executor.map(
+                _render, post_ids, chunksize=16
+            ):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'Пост {post_id}: {error}')
+                else:
+                    done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано: {done}, с ошибками: {failed}'
+        ))
@@ -0,0 +1,46 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from blog.jobs import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь фото публикаций'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Завершиться, когда очередь опустеет'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=5,
+            help='Пауза между опросами пустой очереди, секунды'
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=3,
+            help='Число попыток до пометки задачи как ошибочной'
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help='Через сколько секунд зависшая задача вернётся в очередь'
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options['stale_after'])
+        try:
+            while True:
+                requeue_stale_jobs(stale_after)
+                job = claim_next_job()
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                status = run_job(job, options['max_attempts'])
+                self.stdout.write(f'Пост {job.post_id}: {status}')
+                if job.error:
+                    self.stderr.write(job.error)
+        except KeyboardInterrupt:
+            pass
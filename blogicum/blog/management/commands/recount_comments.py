@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.query_utils import recount_comments
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики комментариев у публикаций'
+
+    def handle(self, *args, **options):
+        repaired = recount_comments()
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {repaired}')
+        )
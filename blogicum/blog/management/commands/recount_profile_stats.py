@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blog.query_utils import recount_profile_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики профилей пользователей'
+
+    def handle(self, *args, **options):
+        recounted = recount_profile_stats()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано профилей: {recounted}')
+        )
@@ -0,0 +1,30 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from blog.search import BATCH_SIZE, reindex
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает поисковый индекс публикаций, '
+        'приводя слова к основам в нескольких процессах'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Сколько процессов приводят слова к основам'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько публикаций обрабатывать одной пачкой'
+        )
+
+    def handle(self, *args, **options):
+        indexed = reindex(
+            batch_size=options['batch_size'], workers=options['workers']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано публикаций: {indexed}')
+        )
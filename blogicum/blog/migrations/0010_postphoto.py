@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostPhoto',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='photo', serialize=False, to='blog.post', verbose_name='Публикация')),
+                ('thumbnail', models.ImageField(blank=True, upload_to='', verbose_name='Фото для ленты')),
+                ('medium', models.ImageField(blank=True, upload_to='', verbose_name='Фото для страницы поста')),
+            ],
+            options={
+                'verbose_name': 'копии фото',
+                'verbose_name_plural': 'Копии фото',
+            },
+        ),
+    ]
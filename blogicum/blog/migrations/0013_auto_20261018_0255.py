@@ -0,0 +1,28 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_auto_20261018_0254'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postphoto',
+            name='color',
+            field=models.CharField(blank=True, help_text='Заливка на месте фото, пока оно загружается.', max_length=7, verbose_name='Средний цвет'),
+        ),
+        migrations.AddField(
+            model_name='postphoto',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Высота оригинала'),
+        ),
+        migrations.AddField(
+            model_name='postphoto',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Ширина оригинала'),
+        ),
+    ]
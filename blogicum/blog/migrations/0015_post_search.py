@@ -0,0 +1,57 @@
+# Generated by Django 3.2.16 on 2026-10-18 03:14
+
+from django.db import OperationalError, migrations, models
+import django.db.models.deletion
+
+
+def create_fts(apps, schema_editor):
+    # Индекс FTS5 есть только у SQLite, собранного с этим модулем;
+    # без него поиск работает по таблице blog_postterm.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE blog_post_fts USING fts5('
+                "title, text, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            return
+        cursor.execute(
+            'INSERT INTO blog_post_fts (rowid, title, text) '
+            'SELECT id, title, text FROM blog_post'
+        )
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS blog_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Слово')),
+                ('weight', models.PositiveIntegerField(verbose_name='Вес')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='blog.post', verbose_name='Публикация')),
+            ],
+            options={
+                'verbose_name': 'слово поиска',
+                'verbose_name_plural': 'Поисковый индекс',
+                'default_related_name': 'terms',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='postterm',
+            index=models.Index(fields=['term', 'post'], name='post_term_idx'),
+        ),
+        migrations.RunPython(create_fts, drop_fts),
+    ]
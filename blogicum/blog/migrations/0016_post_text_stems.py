@@ -0,0 +1,83 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:02
+
+import re
+
+import snowballstemmer
+from django.db import migrations, models
+
+
+def stem_text(text, stemmers, cache):
+    tokens = []
+    for token in re.findall(r'\w+', text.lower().replace('ё', 'е')):
+        if token not in cache:
+            if re.search('[а-я]', token):
+                cache[token] = stemmers['russian'].stemWord(token)
+            elif re.search('[a-z]', token):
+                cache[token] = stemmers['english'].stemWord(token)
+            else:
+                cache[token] = token
+        tokens.append(cache[token][:64])
+    return ' '.join(tokens)
+
+
+def fill_text_stems(apps, schema_editor):
+    # Основы слов считаются здесь же: миграция не должна зависеть
+    # от того, как blog.search устроен в будущих версиях.
+    Post = apps.get_model('blog', 'Post')
+    stemmers = {
+        language: snowballstemmer.stemmer(language)
+        for language in ('russian', 'english')
+    }
+    cache = {}
+    fts = (
+        schema_editor.connection.vendor == 'sqlite'
+        and 'blog_post_fts'
+        in schema_editor.connection.introspection.table_names()
+    )
+    batch = []
+
+    def flush():
+        Post.objects.bulk_update(batch, ('text_stems',))
+        if fts:
+            with schema_editor.connection.cursor() as cursor:
+                cursor.executemany(
+                    'DELETE FROM blog_post_fts WHERE rowid = %s',
+                    [(post.pk,) for post in batch]
+                )
+                cursor.executemany(
+                    'INSERT INTO blog_post_fts (rowid, title, text) '
+                    'VALUES (%s, %s, %s)',
+                    [
+                        (
+                            post.pk,
+                            stem_text(post.title, stemmers, cache),
+                            post.text_stems,
+                        )
+                        for post in batch
+                    ]
+                )
+
+    for post in Post.objects.only('title', 'text').iterator():
+        post.text_stems = stem_text(post.text, stemmers, cache)
+        batch.append(post)
+        if len(batch) >= 500:
+            flush()
+            batch = []
+    if batch:
+        flush()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_post_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='text_stems',
+            field=models.TextField(blank=True, editable=False, help_text='Текст, приведённый к основам слов для поиска.', verbose_name='Основы слов текста'),
+        ),
+        migrations.RunPython(fill_text_stems, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 3.2.16 on 2026-10-18 03:22
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def fill_profile_stats(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    ProfileStats = apps.get_model('blog', 'ProfileStats')
+    stats = {
+        user_id: ProfileStats(user_id=user_id)
+        for user_id in User.objects.values_list('pk', flat=True).iterator()
+    }
+    for row in (
+        Post.objects.order_by().values('author')
+        .annotate(total=Count('pk'), last=Max('pub_date'))
+    ):
+        stats[row['author']].post_count = row['total']
+        stats[row['author']].last_post_at = row['last']
+    for row in (
+        Post.objects.filter(is_published=True, category__is_published=True)
+        .order_by().values('author').annotate(total=Count('pk'))
+    ):
+        stats[row['author']].published_count = row['total']
+    for row in (
+        Comment.objects.order_by().values('author')
+        .annotate(total=Count('pk'))
+    ):
+        stats[row['author']].comment_count = row['total']
+    ProfileStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0016_post_text_stems'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Публикаций')),
+                ('published_count', models.PositiveIntegerField(default=0, help_text='Публикации, видимые другим пользователям, включая отложенные.', verbose_name='Опубликованных')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+                ('last_post_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя публикация')),
+            ],
+            options={
+                'verbose_name': 'статистика профиля',
+                'verbose_name_plural': 'Статистика профилей',
+            },
+        ),
+        migrations.RunPython(fill_profile_stats, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,11 @@
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.urls import reverse
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import redirect
 
+from .jobs import enqueue_image_job
 from .models import Comment, Post
+from .pagination import paginate
 
 
 class CommentMixin:
@@ -12,12 +15,8 @@ class CommentMixin:
     pk_url_kwarg = 'comment_id'
     template_name = 'blog/comment.html'
 
-    def get_object(self):
-        return get_object_or_404(
-            Comment,
-            pk=self.kwargs['comment_id'],
-            post=self.kwargs['post_id']
-        )
+    def get_queryset(self):
+        return Comment.objects.filter(post_id=self.kwargs['post_id'])
 
 
 class PostMixin:
@@ -27,12 +26,28 @@ class PostMixin:
     pk_url_kwarg = 'post_id'
 
 
+class PostImageMixin:
+    """Миксин, ставящий загруженное фото в очередь на обработку"""
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if 'image' in form.changed_data:
+            enqueue_image_job(self.object)
+        return response
+
+
 class OnlyAuthorMixin(UserPassesTestMixin):
     """Миксин, проверяющий авторство"""
 
+    def get_object(self, queryset=None):
+        # Объект нужен и проверке прав, и самому представлению:
+        # достаём его из базы один раз за запрос.
+        if not hasattr(self, '_object'):
+            self._object = super().get_object(queryset)
+        return self._object
+
     def test_func(self):
-        object = self.get_object()
-        return object.author == self.request.user
+        return self.get_object().author_id == self.request.user.pk
 
     def handle_no_permission(self):
         return redirect(
@@ -41,6 +56,23 @@ class OnlyAuthorMixin(UserPassesTestMixin):
         )
 
 
+class PostPaginationMixin:
+    """Миксин, подключающий к ListView пагинацию ленты"""
+
+    paginate_by = settings.PAGINATE_BY
+
+    def get_count_key(self):
+        """Ключ кэша числа постов в ленте; None — не кэшировать."""
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        page = paginate(
+            self.request, queryset, page_size,
+            count_key=self.get_count_key()
+        )
+        return page.paginator, page, page.object_list, page.has_other_pages()
+
+
 class ReversePostDetailMixin:
     """Миксин, отвечающий за реверс на страницу поста"""
 
@@ -1,8 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.text import Truncator
 
 
 NAME_LENGTH = 256
+EXCERPT_WORDS = 10
 
 User = get_user_model()
 
@@ -59,6 +61,41 @@ class Location(BaseModel):
         return self.name
 
 
+def make_excerpt(text):
+    """Анонс для карточки: то же, что truncatewords:10 в шаблоне."""
+    return Truncator(
+        Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+    ).chars(NAME_LENGTH)
+
+
+class PostQuerySet(models.QuerySet):
+    """Публикации; справочники по запросу берутся из реестров, а не JOIN"""
+
+    _with_registries = False
+
+    def with_registries(self):
+        clone = self._chain()
+        clone._with_registries = True
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._with_registries = self._with_registries
+        return clone
+
+    def _fetch_all(self):
+        attach = (
+            self._result_cache is None
+            and self._with_registries
+            and self._iterable_class is models.query.ModelIterable
+        )
+        super()._fetch_all()
+        if attach:
+            from .registry import categories, locations
+            categories.attach(self._result_cache)
+            locations.attach(self._result_cache)
+
+
 class Post(BaseModel):
     title = models.CharField(max_length=NAME_LENGTH, verbose_name='Заголовок')
     text = models.TextField(verbose_name='Текст')
@@ -92,12 +129,51 @@ class Post(BaseModel):
         blank=True,
         verbose_name='Фото'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        null=True,
+        verbose_name='Изменено'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    excerpt = models.CharField(
+        max_length=NAME_LENGTH,
+        blank=True,
+        editable=False,
+        verbose_name='Анонс'
+    )
+    text_stems = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Основы слов текста',
+        help_text='Текст, приведённый к основам слов для поиска.'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         default_related_name = 'posts'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_published_feed_idx'
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                name='post_category_feed_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
@@ -130,6 +206,179 @@ class Comment(models.Model):
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at'),
+                name='comment_post_created_idx'
+            ),
+        )
 
     def __str__(self):
         return f"{self.author.username}: {self.text[:50]}"
+
+
+class PostPhoto(models.Model):
+    """Уменьшенные копии фото публикации."""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='photo',
+        verbose_name='Публикация'
+    )
+    thumbnail = models.ImageField(
+        blank=True,
+        verbose_name='Фото для ленты'
+    )
+    medium = models.ImageField(
+        blank=True,
+        verbose_name='Фото для страницы поста'
+    )
+    width = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Ширина оригинала'
+    )
+    height = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='Высота оригинала'
+    )
+    color = models.CharField(
+        max_length=7,
+        blank=True,
+        verbose_name='Средний цвет',
+        help_text='Заливка на месте фото, пока оно загружается.'
+    )
+
+    class Meta:
+        verbose_name = 'копии фото'
+        verbose_name_plural = 'Копии фото'
+
+    def __str__(self):
+        return str(self.post)
+
+
+class ImageJob(models.Model):
+    """Задача фоновой обработки фото публикации."""
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Публикация'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начато'
+    )
+
+    class Meta:
+        verbose_name = 'обработка фото'
+        verbose_name_plural = 'Обработка фото'
+        default_related_name = 'image_jobs'
+        ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('status', 'created_at'),
+                name='image_job_queue_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.post_id}: {self.get_status_display()}'
+
+
+class PostTerm(models.Model):
+    """Запись обратного индекса поиска: слово и его вес в публикации."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Публикация'
+    )
+    term = models.CharField(max_length=64, verbose_name='Слово')
+    weight = models.PositiveIntegerField(verbose_name='Вес')
+
+    class Meta:
+        verbose_name = 'слово поиска'
+        verbose_name_plural = 'Поисковый индекс'
+        default_related_name = 'terms'
+        indexes = (
+            models.Index(fields=('term', 'post'), name='post_term_idx'),
+        )
+
+    def __str__(self):
+        return self.term
+
+
+class ProfileStats(models.Model):
+    """
+    Счётчики профиля пользователя.
+
+    Обновляются сигналами при каждой записи, чтобы страница профиля
+    и её пагинатор обходились без агрегирующих запросов.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='profile_stats',
+        verbose_name='Пользователь'
+    )
+    post_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Публикаций'
+    )
+    published_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Опубликованных',
+        help_text=(
+            'Публикации, видимые другим пользователям, '
+            'включая отложенные.'
+        )
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментариев'
+    )
+    last_post_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Последняя публикация'
+    )
+
+    class Meta:
+        verbose_name = 'статистика профиля'
+        verbose_name_plural = 'Статистика профилей'
+
+    def __str__(self):
+        return str(self.user_id)
@@ -0,0 +1,292 @@
+import base64
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import (
+    EmptyPage, Page, PageNotAnInteger, Paginator
+)
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .cache import FEEDS, feed_cache_timeout, get_version
+from .query_utils import COMMENTS_ORDERING, POSTS_ORDERING
+
+
+CURSOR_PARAM = 'cursor'
+# Целые вне знакового 64-битного диапазона база не примет.
+MIN_INTEGER = -2 ** 63
+MAX_INTEGER = 2 ** 63 - 1
+
+
+class CursorPage:
+    """Страница курсорной пагинации"""
+
+    cursor_mode = True
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Пагинатор по ключу сортировки (keyset).
+
+    Вместо COUNT(*) и OFFSET страница выбирается условием
+    «строго после последней записи предыдущей страницы», поэтому
+    любая страница стоит столько же, сколько первая.
+    Сортировка должна быть полной, то есть заканчиваться уникальным полем.
+    """
+
+    def __init__(self, queryset, per_page, ordering=POSTS_ORDERING):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = ordering
+
+    def _fields(self):
+        return [
+            self.queryset.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+
+    def encode_cursor(self, obj, backwards=False):
+        values = [field.value_to_string(obj) for field in self._fields()]
+        raw = json.dumps([int(backwards), values]).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает (backwards, values) или None для битого курсора."""
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            backwards, values = json.loads(raw)
+            fields = self._fields()
+            if len(values) != len(fields):
+                return None
+            values = [
+                field.to_python(value)
+                for field, value in zip(fields, values)
+            ]
+            # Сравнение с NULL в фильтре невозможно, а слишком большое
+            # целое не поместится в базу: такой курсор не выдаёт
+            # encode_cursor, значит, он подделан.
+            if any(value is None for value in values):
+                return None
+            if any(
+                isinstance(value, int)
+                and not MIN_INTEGER <= value <= MAX_INTEGER
+                for value in values
+            ):
+                return None
+            return bool(backwards), values
+        except (ValueError, TypeError, ValidationError):
+            return None
+
+    @staticmethod
+    def _keyset_filter(ordering, values):
+        condition = Q()
+        equal = Q()
+        for name, value in zip(ordering, values):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{field}__{lookup}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def page(self, cursor=None):
+        position = self.decode_cursor(cursor)
+        backwards = position is not None and position[0]
+        ordering = self.ordering
+        if backwards:
+            ordering = tuple(
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in ordering
+            )
+        queryset = self.queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self._keyset_filter(ordering, position[1])
+            )
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=(
+                self.encode_cursor(rows[-1]) if has_next and rows else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(rows[0], backwards=True)
+                if has_previous and rows else None
+            ),
+        )
+
+
+class UncountedPage(Page):
+    """Страница ленты, число записей которой посчитано не до конца"""
+
+    def __init__(self, object_list, number, paginator, has_more):
+        super().__init__(object_list, number, paginator)
+        self.has_more = has_more
+
+    def __repr__(self):
+        return f'<Page {self.number}>'
+
+    def has_next(self):
+        return self.has_more
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1
+
+
+class CachedCountPaginator(Paginator):
+    """
+    Нумерованный пагинатор без COUNT(*) на каждый запрос.
+
+    Число записей берётся готовым (count), из кэша по count_key
+    или считается с ограничением PAGINATOR_COUNT_LIMIT: дальше
+    лента считается «бесконечной», и номер последней страницы
+    не показывается, а страницы за пределом открываются по наличию
+    записей. Ссылки выводятся окном вокруг текущей страницы.
+    """
+
+    def __init__(self, object_list, per_page, count_key=None, count=None,
+                 **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_key = count_key
+        self.count_exact = True
+        if count is not None:
+            self.count = count
+
+    def _cache_key(self):
+        return f'blog:count:{get_version(FEEDS)}:{self.count_key}'
+
+    @cached_property
+    def count(self):
+        if self.count_key is not None:
+            cached = cache.get(self._cache_key())
+            if cached is not None:
+                self.count_exact = cached[1]
+                return cached[0]
+        limit = settings.PAGINATOR_COUNT_LIMIT
+        count = self.object_list.order_by()[:limit].count()
+        self.count_exact = count < limit
+        if self.count_key is not None:
+            timeout = feed_cache_timeout()
+            if timeout > 0:
+                cache.set(
+                    self._cache_key(), (count, self.count_exact), timeout
+                )
+        return count
+
+    def validate_number(self, number):
+        # count вычисляется первым: он же выясняет count_exact.
+        if not self.count or self.count_exact:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        # Смещение такой страницы не поместится в OFFSET.
+        if (number - 1) * self.per_page > MAX_INTEGER:
+            raise EmptyPage('That page contains no results')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if self.count_exact:
+            page = super().page(number)
+            page.page_window = list(self.get_elided_page_range(
+                page.number, on_each_side=2, on_ends=1
+            ))
+            return page
+        # За пределом подсчёта следующая страница определяется
+        # по лишней записи, а не по числу страниц.
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('That page contains no results')
+        page = UncountedPage(
+            rows[:self.per_page], number, self,
+            has_more=len(rows) > self.per_page
+        )
+        page.page_window = self.uncounted_window(page)
+        return page
+
+    def get_page(self, number):
+        try:
+            return super().get_page(number)
+        except EmptyPage:
+            # Номер за концом ленты, который подсчёт не отсёк.
+            return self.page(self.num_pages)
+
+    def uncounted_window(self, page):
+        """Окно страниц без последней: её номер неизвестен."""
+        first = max(1, page.number - 2)
+        last = max(
+            min(page.number + 2, self.num_pages),
+            page.number + page.has_next()
+        )
+        window = list(range(first, last + 1))
+        if first > 1:
+            window.insert(0, self.ELLIPSIS)
+        if page.has_next():
+            window.append(self.ELLIPSIS)
+        return window
+
+
+def paginate(request, queryset, per_page=settings.PAGINATE_BY,
+             count_key=None, count=None):
+    """
+    Возвращает страницу ленты.
+
+    Курсорный режим включается параметром запроса `cursor`
+    или настройкой CURSOR_PAGINATION, иначе используется
+    нумерованная пагинация с кэшированным числом записей.
+    """
+    cursor = request.GET.get(CURSOR_PARAM)
+    if cursor is not None or settings.CURSOR_PAGINATION:
+        return CursorPaginator(queryset, per_page).page(cursor)
+    return CachedCountPaginator(
+        queryset, per_page, count_key=count_key, count=count
+    ).get_page(request.GET.get('page'))
+
+
+def paginate_comments(request, queryset,
+                      per_page=settings.COMMENTS_PAGINATE_BY):
+    """Страница комментариев: всегда курсорная, от старых к новым."""
+    return CursorPaginator(queryset, per_page, COMMENTS_ORDERING).page(
+        request.GET.get(CURSOR_PARAM)
+    )
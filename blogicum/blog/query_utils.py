@@ -1,36 +1,197 @@
-from django.db.models import Count
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 
-from .models import Category, Post
+from .models import Comment, Post, ProfileStats, User, make_excerpt
+from .registry import categories
+from .routers import feed_alias
 
 
-def get_posts(manager=Post.objects, filtred=False, annotated=False):
+POSTS_ORDERING = ('-pub_date', '-id')
+COMMENTS_ORDERING = ('created_at', 'id')
+# Поля поста, которые нужны карточке в ленте.
+CARD_FIELDS = (
+    'is_published',
+    'title',
+    'pub_date',
+    'author',
+    'author__username',
+    'location',
+    'category',
+    'image',
+    'updated_at',
+    'comment_count',
+    'excerpt',
+    'photo__thumbnail',
+    'photo__medium',
+    'photo__width',
+    'photo__height',
+    'photo__color',
+)
+
+
+def get_posts(manager=Post.objects, filtred=False, annotated=False,
+              projected=False):
     queryset = manager.select_related(
-        'category',
         'author',
-        'location'
-    )
+        'photo'
+    ).with_registries().using(feed_alias())
     if filtred:
+        # NOT IN по немногим скрытым категориям вместо JOIN:
+        # так лента остаётся на индексе опубликованных постов.
         queryset = queryset.filter(
             pub_date__lte=timezone.now(),
             is_published=True,
-            category__is_published=True
-        )
+            category__isnull=False
+        ).exclude(category_id__in=categories.unpublished_ids())
     if annotated:
-        queryset = queryset.annotate(
-            comment_count=Count('comments')
-        ).order_by('-pub_date')
+        queryset = queryset.order_by(*POSTS_ORDERING)
+    if projected:
+        queryset = queryset.only(*CARD_FIELDS)
 
     return queryset
 
 
+def get_comments(manager=Comment.objects):
+    """Комментарии с автором одним запросом и только нужными полями."""
+    return manager.select_related('author').only(
+        'text',
+        'created_at',
+        'post',
+        'author',
+        'author__username'
+    )
+
+
+def is_post_visible(post, user):
+    """Те же правила, что у get_posts(filtred=True), плюс автор видит всё."""
+    if post.author_id == user.pk:
+        return True
+    return (
+        post.is_published
+        and post.pub_date <= timezone.now()
+        and post.category is not None
+        and post.category.is_published
+    )
+
+
+def get_post_or_404(user, post_id):
+    """Пост, если он виден пользователю; одним запросом."""
+    post = get_object_or_404(get_posts(), pk=post_id)
+    if not is_post_visible(post, user):
+        raise Http404('No Post matches the given query.')
+    return post
+
+
+def recount_comments(posts=None):
+    """
+    Пересчитывает Post.comment_count по таблице комментариев.
+
+    Обновляются только разошедшиеся строки; возвращается их число.
+    """
+    if posts is None:
+        posts = Post.objects.all()
+    actual = Coalesce(
+        Subquery(
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+    return posts.exclude(comment_count=actual).update(comment_count=actual)
+
+
+def _count_by(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('user')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def recount_profile_stats(users=None):
+    """
+    Пересчитывает ProfileStats по публикациям и комментариям.
+
+    Недостающие записи создаются; возвращается число пересчитанных.
+    """
+    if users is None:
+        users = User.objects.all()
+    ProfileStats.objects.bulk_create(
+        ProfileStats(user_id=user_id)
+        for user_id in users.filter(profile_stats__isnull=True)
+        .values_list('pk', flat=True)
+    )
+    return ProfileStats.objects.filter(user__in=users).update(
+        post_count=_count_by(Post.objects.all(), 'author'),
+        published_count=_count_by(
+            Post.objects.filter(
+                is_published=True, category__is_published=True
+            ),
+            'author'
+        ),
+        comment_count=_count_by(Comment.objects.all(), 'author'),
+        last_post_at=Subquery(
+            Post.objects.filter(author=OuterRef('user'))
+            .order_by()
+            .values('author')
+            .annotate(last=Max('pub_date'))
+            .values('last')
+        )
+    )
+
+
+def get_profile_stats(user):
+    """Счётчики профиля; недостающая запись создаётся пересчётом."""
+    try:
+        return user.profile_stats
+    except ProfileStats.DoesNotExist:
+        recount_profile_stats(User.objects.filter(pk=user.pk))
+        return ProfileStats.objects.get(pk=user.pk)
+
+
+def fill_excerpts(posts=None, batch_size=1000):
+    """
+    Пересчитывает Post.excerpt по тексту публикаций.
+
+    Записываются только разошедшиеся строки; возвращается их число.
+    """
+    if posts is None:
+        posts = Post.objects.all()
+    updated = 0
+    batch = []
+    for post in posts.only('text', 'excerpt').iterator(batch_size):
+        excerpt = make_excerpt(post.text)
+        if post.excerpt != excerpt:
+            post.excerpt = excerpt
+            batch.append(post)
+        if len(batch) >= batch_size:
+            Post.objects.bulk_update(batch, ('excerpt',))
+            updated += len(batch)
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ('excerpt',))
+        updated += len(batch)
+    return updated
+
+
 class CategoryPage:
     """Класс для работы с категориями"""
 
     def get_category(self):
-        return get_object_or_404(
-            Category,
-            slug=self.kwargs['category_slug'],
-            is_published=True
-        )
+        if not hasattr(self, '_category'):
+            category = categories.get_by_slug(self.kwargs['category_slug'])
+            if category is None or not category.is_published:
+                raise Http404('No Category matches the given query.')
+            self._category = category
+        return self._category
@@ -0,0 +1,104 @@
+import time
+
+from django.conf import settings
+
+from .cache import CATEGORIES, LOCATIONS, cache_is_shared, get_version
+from .models import Category, Location, Post
+
+
+class ModelRegistry:
+    """
+    Записи небольшой справочной таблицы в памяти процесса.
+
+    Справочники малы, а нужны почти в каждой карточке, поэтому
+    вместо JOIN в каждом запросе ленты они читаются из базы один раз.
+    Актуальность проверяется по поколению кэша, которое сигналы
+    сдвигают при сохранении и удалении записей. С общим кэшем все
+    процессы перечитывают реестр одновременно; с кэшем в памяти
+    процесса поколение сдвигается только у записавшего процесса,
+    поэтому остальные перечитывают реестр не реже раза
+    в REGISTRY_RELOAD_INTERVAL секунд.
+    """
+
+    model = None
+    version_name = None
+    post_field = None
+    fields = ()
+
+    def __init__(self):
+        self._state = (None, {}, {}, 0.0)
+
+    def build_indexes(self, by_id):
+        """Дополнительные индексы поверх словаря по первичному ключу."""
+        return {}
+
+    def _load(self):
+        version = get_version(self.version_name)
+        state = self._state
+        now = time.monotonic()
+        expired = (
+            not cache_is_shared()
+            and now - state[3] > settings.REGISTRY_RELOAD_INTERVAL
+        )
+        if state[0] != version or expired:
+            queryset = self.model.objects.all()
+            if self.fields:
+                queryset = queryset.only(*self.fields)
+            by_id = {obj.pk: obj for obj in queryset}
+            state = self._state = (
+                version, by_id, self.build_indexes(by_id), now
+            )
+        return state[1], state[2]
+
+    def get(self, pk):
+        return self._load()[0].get(pk)
+
+    def all(self):
+        return self._load()[0].values()
+
+    def attach(self, posts):
+        """Подставляет постам записи из реестра без запросов к базе."""
+        by_id = self._load()[0]
+        field = Post._meta.get_field(self.post_field)
+        attname = field.get_attname()
+        for post in posts:
+            obj = by_id.get(getattr(post, attname))
+            if obj is not None:
+                field.set_cached_value(post, obj)
+
+
+class CategoryRegistry(ModelRegistry):
+    model = Category
+    version_name = CATEGORIES
+    post_field = 'category'
+
+    def build_indexes(self, by_id):
+        return {
+            'slug': {category.slug: category for category in by_id.values()}
+        }
+
+    def get_by_slug(self, slug):
+        return self._load()[1]['slug'].get(slug)
+
+    def unpublished_ids(self):
+        return [
+            category.pk for category in self.all()
+            if not category.is_published
+        ]
+
+
+class LocationRegistry(ModelRegistry):
+    model = Location
+    version_name = LOCATIONS
+    post_field = 'location'
+    fields = ('name', 'is_published')
+
+
+categories = CategoryRegistry()
+locations = LocationRegistry()
+
+
+def warm_up():
+    """Загружает все реестры заранее, например перед замерами."""
+    for registry in (categories, locations):
+        registry.all()
@@ -0,0 +1,68 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA = 'replica'
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_request = ContextVar('blog_request', default=None)
+_wrote = ContextVar('blog_wrote', default=False)
+
+
+def feed_alias():
+    """
+    База для чтения лент и постов в текущем запросе.
+
+    Реплика — только для читающих запросов анонимов, и то если
+    клиент недавно ничего не записывал: иначе он мог бы не увидеть
+    собственных изменений, пока они не дошли до реплики.
+    """
+    request = _request.get()
+    if (
+        REPLICA not in connections.databases
+        or request is None
+        or request.method not in SAFE_METHODS
+        or PIN_COOKIE in request.COOKIES
+        or request.user.is_authenticated
+    ):
+        return DEFAULT_DB_ALIAS
+    return REPLICA
+
+
+class PrimaryReplicaRouter:
+    """Пишет всегда в основную базу и запоминает, что запрос писал"""
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплика — копия основной базы, связи между ними допустимы.
+        return True
+
+
+class ReplicaPinMiddleware:
+    """После записи закрепляет клиента за основной базой на время задержки"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_token = _request.set(request)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get():
+                response.set_cookie(
+                    PIN_COOKIE, '1',
+                    max_age=settings.REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax'
+                )
+        finally:
+            _request.reset(request_token)
+            _wrote.reset(wrote_token)
+        return response
@@ -0,0 +1,45 @@
+from django.core.cache import cache
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import Post
+
+
+NEXT_PUBLICATION_KEY = 'blog:next_publication'
+NOTHING_SCHEDULED = 'nothing'
+
+
+def next_publication():
+    """
+    Дата ближайшей отложенной публикации или None.
+
+    Значение хранится в кэше до изменения любого поста
+    и пересчитывается, как только наступает.
+    """
+    now = timezone.now()
+    scheduled = cache.get(NEXT_PUBLICATION_KEY)
+    if scheduled == NOTHING_SCHEDULED:
+        return None
+    if scheduled is not None and scheduled > now:
+        return scheduled
+    scheduled = Post.objects.filter(
+        pub_date__gt=now
+    ).aggregate(next_pub_date=Min('pub_date'))['next_pub_date']
+    cache.set(
+        NEXT_PUBLICATION_KEY,
+        NOTHING_SCHEDULED if scheduled is None else scheduled,
+        timeout=None
+    )
+    return scheduled
+
+
+def seconds_until_next_publication():
+    """Сколько секунд текущие ленты остаются верными, None — бессрочно."""
+    scheduled = next_publication()
+    if scheduled is None:
+        return None
+    return (scheduled - timezone.now()).total_seconds()
+
+
+def reset_schedule():
+    cache.delete(NEXT_PUBLICATION_KEY)
@@ -0,0 +1,293 @@
+import math
+import re
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import django
+import snowballstemmer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+
+from .cache import FEEDS, feed_cache_timeout, get_version
+from .models import Post, PostTerm
+
+
+FTS_TABLE = 'blog_post_fts'
+TOKEN_RE = re.compile(r'\w+')
+CYRILLIC_RE = re.compile('[а-я]')
+LATIN_RE = re.compile('[a-z]')
+# Слово в заголовке весит, как столько же слов в тексте.
+TITLE_WEIGHT = 3
+MAX_TERM_LENGTH = 64
+BATCH_SIZE = 500
+# Служебные слова не ищутся: каждое слово запроса обязательно,
+# а предлог в нужной форме есть не в каждом тексте.
+STOP_WORDS = frozenset((
+    'а', 'без', 'в', 'во', 'для', 'до', 'же', 'за', 'и', 'из', 'или',
+    'к', 'ко', 'ли', 'на', 'над', 'не', 'ни', 'о', 'об', 'от', 'по',
+    'под', 'при', 'про', 'с', 'со', 'у', 'что', 'a', 'an', 'and', 'at',
+    'by', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with',
+))
+
+_stemmers = threading.local()
+
+
+def _stemmer(language):
+    # Стеммеры Snowball хранят состояние разбора: у каждого потока свой.
+    if not hasattr(_stemmers, language):
+        setattr(_stemmers, language, snowballstemmer.stemmer(language))
+    return getattr(_stemmers, language)
+
+
+@lru_cache(maxsize=100_000)
+def stem(token):
+    """Основа слова: русского или английского, иначе слово как есть."""
+    if CYRILLIC_RE.search(token):
+        return _stemmer('russian').stemWord(token)
+    if LATIN_RE.search(token):
+        return _stemmer('english').stemWord(token)
+    return token
+
+
+def tokenize(text):
+    """Основы слов текста в нижнем регистре."""
+    return [
+        stem(token)[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(text.lower().replace('ё', 'е'))
+    ]
+
+
+def stem_text(text):
+    """Основы слов текста одной строкой, как их хранит Post.text_stems."""
+    return ' '.join(tokenize(text))
+
+
+def query_terms(query):
+    """Уникальные основы значимых слов запроса в исходном порядке."""
+    words = TOKEN_RE.findall(query.lower().replace('ё', 'е'))
+    return list(dict.fromkeys(
+        term for word, term in zip(words, tokenize(query))
+        if word not in STOP_WORDS
+    ))
+
+
+def make_document(post_id, title, text):
+    """Документ индекса: id публикации, основы заголовка и текста."""
+    return post_id, stem_text(title), stem_text(text)
+
+
+def post_document(post):
+    """Документ индекса по публикации с уже посчитанным text_stems."""
+    return post.pk, stem_text(post.title), post.text_stems
+
+
+def document_terms(document):
+    """Основы документа с весами: число вхождений, заголовок весомее."""
+    _, title, text = document
+    terms = Counter(text.split())
+    for token in title.split():
+        terms[token] += TITLE_WEIGHT
+    return terms
+
+
+class FtsBackend:
+    """Поиск по виртуальной таблице SQLite FTS5 с ранжированием bm25"""
+
+    def _execute(self, sql, params_list):
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.executemany(sql, params_list)
+
+    def remove(self, post_ids):
+        self._execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(post_id,) for post_id in post_ids]
+        )
+
+    def index(self, documents):
+        self.remove([post_id for post_id, _, _ in documents])
+        self._execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            documents
+        )
+
+    def search(self, queryset, terms):
+        match = ' '.join(f'"{term}"' for term in terms)
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[
+                f'{FTS_TABLE}.rowid = blog_post.id',
+                f'{FTS_TABLE} MATCH %s',
+            ],
+            params=[match],
+            select={
+                'search_rank': f'bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1)'
+            },
+            order_by=['search_rank', '-pub_date'],
+        )
+
+
+class TermBackend:
+    """
+    Поиск по обратному индексу в таблице PostTerm.
+
+    Работает на любой базе. Публикация находится, если содержит
+    все слова запроса; ранг — сумма весов слов, умноженных на их
+    редкость (idf).
+    """
+
+    def remove(self, post_ids):
+        PostTerm.objects.filter(post_id__in=post_ids).delete()
+
+    def index(self, documents):
+        self.remove([post_id for post_id, _, _ in documents])
+        PostTerm.objects.bulk_create(
+            PostTerm(post_id=document[0], term=term, weight=weight)
+            for document in documents
+            for term, weight in document_terms(document).items()
+        )
+
+    def total(self):
+        """Число публикаций для idf; пересчитывается с лентами."""
+        key = f'blog:search_total:{get_version(FEEDS)}'
+        total = cache.get(key)
+        if total is None:
+            total = Post.objects.count()
+            timeout = feed_cache_timeout()
+            if timeout > 0:
+                cache.set(key, total, timeout)
+        return total
+
+    def search(self, queryset, terms):
+        frequencies = dict(
+            PostTerm.objects.filter(term__in=terms)
+            .values_list('term')
+            .annotate(posts=Count('post', distinct=True))
+        )
+        if len(frequencies) < len(terms):
+            return queryset.none()
+        total = self.total()
+        rank = Sum(
+            Case(
+                *(
+                    When(
+                        terms__term=term,
+                        then=F('terms__weight') * Value(
+                            math.log(1 + total / frequency)
+                        )
+                    )
+                    for term, frequency in frequencies.items()
+                ),
+                output_field=FloatField()
+            )
+        )
+        return queryset.filter(terms__term__in=terms).annotate(
+            search_rank=rank,
+            matched_terms=Count('terms__term', distinct=True)
+        ).filter(
+            matched_terms=len(terms)
+        ).order_by('-search_rank', '-pub_date')
+
+
+def fts_available():
+    """Создала ли миграция таблицу FTS5 в основной базе."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    return (
+        connection.vendor == 'sqlite'
+        and FTS_TABLE in connection.introspection.table_names()
+    )
+
+
+BACKENDS = {'fts5': FtsBackend, 'terms': TermBackend}
+_backends = {}
+
+
+def get_backend():
+    """
+    Движок поиска по настройке SEARCH_BACKEND: fts5, terms или auto.
+
+    В режиме auto наличие FTS5 проверяется один раз за процесс.
+    """
+    name = settings.SEARCH_BACKEND
+    if name not in _backends:
+        if name == 'auto':
+            backend = BACKENDS['fts5' if fts_available() else 'terms']()
+        else:
+            backend = BACKENDS[name]()
+        _backends[name] = backend
+    return _backends[name]
+
+
+def search_posts(queryset, query):
+    """Публикации из queryset по запросу, от более подходящих."""
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none()
+    return get_backend().search(queryset, terms)
+
+
+def _batches(posts, batch_size):
+    batch = []
+    rows = posts.values_list('pk', 'title', 'text', 'text_stems')
+    for row in rows.iterator(batch_size):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _make_documents(rows):
+    return [make_document(*row) for row in rows]
+
+
+def _stemmed_batches(batches, workers):
+    """Пачки строк с их документами; основы считают workers процессов."""
+    if workers <= 1:
+        for batch in batches:
+            yield batch, _make_documents(row[:3] for row in batch)
+        return
+    # Процесс, запущенный через spawn, начинает без настроенного Django.
+    with ProcessPoolExecutor(workers, initializer=django.setup) as executor:
+        pending = deque()
+        for batch in batches:
+            rows = [row[:3] for row in batch]
+            pending.append((batch, executor.submit(_make_documents, rows)))
+            # Не больше двух пачек в работе на процесс,
+            # чтобы память не росла с размером таблицы.
+            if len(pending) >= 2 * workers:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+        for batch, future in pending:
+            yield batch, future.result()
+
+
+def reindex(posts=None, batch_size=BATCH_SIZE, workers=1):
+    """
+    Перестраивает поисковый индекс публикаций; возвращает их число.
+
+    Заодно обновляет разошедшиеся Post.text_stems. Основы слов
+    считаются в workers процессах, в базу пишет только вызывающий.
+    """
+    if posts is None:
+        posts = Post.objects.all()
+    backend = get_backend()
+    indexed = 0
+    for batch, documents in _stemmed_batches(
+        _batches(posts, batch_size), workers
+    ):
+        stale = [
+            Post(pk=post_id, text_stems=text)
+            for (post_id, _, text), row in zip(documents, batch)
+            if row[3] != text
+        ]
+        if stale:
+            Post.objects.bulk_update(stale, ('text_stems',))
+        backend.index(documents)
+        indexed += len(documents)
+    return indexed
@@ -0,0 +1,341 @@
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, DEFERRED, F, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.db.models.signals import (
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save
+)
+from django.dispatch import receiver
+
+from .cache import (
+    CATEGORIES,
+    FEEDS,
+    LOCATIONS,
+    POST,
+    POST_CARDS,
+    bump_version
+)
+from .models import (
+    Category,
+    Comment,
+    Location,
+    Post,
+    PostPhoto,
+    ProfileStats,
+    User,
+    make_excerpt
+)
+from .images import RENDITIONS
+from .query_utils import recount_profile_stats
+from .registry import categories
+from .scheduling import reset_schedule
+from .search import get_backend, post_document, stem_text
+
+
+# Посты, удаляемые прямо сейчас: счётчики их комментариев уже
+# поправлены одним запросом, по каждому комментарию обновлять не нужно.
+deleting_posts = ContextVar('deleting_posts', default=frozenset())
+
+
+def change_comment_count(post_id, delta):
+    """Атомарно сдвигает счётчик комментариев поста на delta."""
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F('comment_count') + delta)
+
+
+def change_profile_stats(user_id, posts=0, published=0, comments=0,
+                         last_post=False):
+    """
+    Атомарно сдвигает счётчики профиля пользователя.
+
+    С last_post дата последней публикации берётся заново
+    из индекса публикаций автора тем же запросом.
+    """
+    stats = ProfileStats.objects.filter(user_id=user_id)
+    changes = {}
+    for field, delta in (
+        ('post_count', posts),
+        ('published_count', published),
+        ('comment_count', comments),
+    ):
+        if delta < 0:
+            stats = stats.filter(**{f'{field}__gte': -delta})
+        if delta:
+            changes[field] = F(field) + delta
+    if last_post:
+        changes['last_post_at'] = Subquery(
+            Post.objects.filter(author=OuterRef('user'))
+            .order_by('-pub_date')
+            .values('pub_date')[:1]
+        )
+    if changes:
+        stats.update(**changes)
+
+
+# Поля публикации, от которых зависят счётчики профиля автора.
+POST_STATS_FIELDS = ('author_id', 'is_published', 'category_id', 'pub_date')
+
+
+def post_stats_state(post):
+    # Отложенные поля не читаем: это стоило бы запроса на каждый пост.
+    return {
+        field: post.__dict__.get(field, DEFERRED)
+        for field in POST_STATS_FIELDS
+    }
+
+
+def counts_as_published(state):
+    """Видна ли публикация другим, не считая даты публикации."""
+    category = categories.get(state['category_id'])
+    return bool(
+        state['is_published']
+        and category is not None
+        and category.is_published
+    )
+
+
+@receiver(pre_save, sender=Post)
+def update_excerpt(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    instance.excerpt = make_excerpt(instance.text)
+
+
+@receiver(pre_save, sender=Post)
+def update_text_stems(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    instance.text_stems = stem_text(instance.text)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'title', 'text'} & set(
+        update_fields
+    ):
+        return
+    get_backend().index([post_document(instance)])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    get_backend().remove([instance.pk])
+
+
+@receiver(post_init, sender=Post)
+def remember_post_stats(sender, instance, **kwargs):
+    instance._initial_stats = post_stats_state(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_stats_saved(sender, instance, created, **kwargs):
+    initial = instance._initial_stats
+    state = instance._initial_stats = post_stats_state(instance)
+    if created:
+        change_profile_stats(
+            state['author_id'],
+            posts=1,
+            published=int(counts_as_published(state)),
+            last_post=True
+        )
+    elif state == initial:
+        return
+    elif DEFERRED in initial.values() or DEFERRED in state.values():
+        recount_profile_stats(User.objects.filter(
+            pk__in={initial['author_id'], state['author_id']} - {DEFERRED}
+        ))
+    elif initial['author_id'] != state['author_id']:
+        change_profile_stats(
+            initial['author_id'],
+            posts=-1,
+            published=-int(counts_as_published(initial)),
+            last_post=True
+        )
+        change_profile_stats(
+            state['author_id'],
+            posts=1,
+            published=int(counts_as_published(state)),
+            last_post=True
+        )
+    else:
+        change_profile_stats(
+            state['author_id'],
+            published=(
+                counts_as_published(state) - counts_as_published(initial)
+            ),
+            last_post=initial['pub_date'] != state['pub_date']
+        )
+
+
+@receiver(post_delete, sender=Post)
+def post_stats_deleted(sender, instance, **kwargs):
+    state = instance._initial_stats
+    if DEFERRED in state.values():
+        recount_profile_stats(User.objects.filter(pk=instance.author_id))
+        return
+    change_profile_stats(
+        state['author_id'],
+        posts=-1,
+        published=-int(counts_as_published(state)),
+        last_post=True
+    )
+
+
+@receiver(post_delete, sender=PostPhoto)
+def delete_rendition_files(sender, instance, **kwargs):
+    # Копии удаляются и вместе с постом; файлы — только после
+    # коммита, чтобы откат не оставил записи без файлов.
+    for field_name in RENDITIONS:
+        rendition = getattr(instance, field_name)
+        if rendition:
+            transaction.on_commit(
+                partial(rendition.storage.delete, rendition.name)
+            )
+
+
+@receiver(post_init, sender=Comment)
+def remember_comment_post(sender, instance, **kwargs):
+    instance._initial_post_id = instance.post_id
+    instance._initial_author_id = instance.author_id
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        change_comment_count(instance.post_id, 1)
+        change_profile_stats(instance.author_id, comments=1)
+        return
+    if instance._initial_post_id != instance.post_id:
+        change_comment_count(instance._initial_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+    if instance._initial_author_id != instance.author_id:
+        change_profile_stats(instance._initial_author_id, comments=-1)
+        change_profile_stats(instance.author_id, comments=1)
+    instance._initial_post_id = instance.post_id
+    instance._initial_author_id = instance.author_id
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    if instance.post_id in deleting_posts.get():
+        return
+    change_comment_count(instance.post_id, -1)
+    change_profile_stats(instance.author_id, comments=-1)
+
+
+@receiver(pre_delete, sender=Post)
+def post_comments_deleting(sender, instance, **kwargs):
+    deleting_posts.set(deleting_posts.get() | {instance.pk})
+    comments = Comment.objects.filter(post=instance)
+    ProfileStats.objects.filter(
+        user__in=comments.values('author')
+    ).update(
+        comment_count=Greatest(
+            F('comment_count') - Subquery(
+                comments.filter(author=OuterRef('user'))
+                .order_by()
+                .values('author')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0
+        )
+    )
+
+
+@receiver(post_delete, sender=Post)
+def post_comments_deleted(sender, instance, **kwargs):
+    deleting_posts.set(deleting_posts.get() - {instance.pk})
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_authors(sender, instance, **kwargs):
+    # После удаления категории у публикаций будет NULL,
+    # и найти их авторов уже не получится.
+    instance._author_ids = list(
+        User.objects.filter(posts__category=instance)
+        .values_list('pk', flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=Category)
+def category_stats_changed(sender, instance, created, **kwargs):
+    if not created:
+        recount_profile_stats(
+            User.objects.filter(posts__category=instance).distinct()
+        )
+
+
+@receiver(post_delete, sender=Category)
+def category_stats_deleted(sender, instance, **kwargs):
+    recount_profile_stats(User.objects.filter(pk__in=instance._author_ids))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, **kwargs):
+    bump_version(CATEGORIES)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def location_changed(sender, **kwargs):
+    bump_version(LOCATIONS)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def post_card_relation_changed(sender, **kwargs):
+    bump_version(POST_CARDS)
+    bump_version(FEEDS)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def feed_content_changed(sender, **kwargs):
+    bump_version(FEEDS)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_page_changed(sender, instance, **kwargs):
+    bump_version(POST.format(post_id=instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def post_comments_changed(sender, instance, **kwargs):
+    bump_version(POST.format(post_id=instance.post_id))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_schedule_changed(sender, **kwargs):
+    reset_schedule()
+
+
+@receiver(post_save, sender=User)
+def create_profile_stats(sender, instance, created, using, raw=False,
+                         **kwargs):
+    if created and not raw:
+        ProfileStats.objects.db_manager(using).create(user=instance)
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_version(POST_CARDS)
+    bump_version(FEEDS)
@@ -0,0 +1,15 @@
+from django import template
+
+from blog.cache import POST_CARDS, get_version, post_card_cache_timeout
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_card_cache():
+    """Параметры фрагментного кэша карточки поста."""
+    return {
+        'timeout': post_card_cache_timeout(),
+        'version': get_version(POST_CARDS),
+    }
@@ -11,6 +11,11 @@ post_urls = [
         views.CommentCreateView.as_view(),
         name='add_comment'
     ),
+    path(
+        '<int:post_id>/comments/',
+        views.CommentListView.as_view(),
+        name='comments'
+    ),
     path(
         '<int:post_id>/edit_comment/<int:comment_id>/',
         views.CommentUpdateView.as_view(),
@@ -54,6 +59,11 @@ urlpatterns = [
         'posts/',
         include(post_urls)
     ),
+    path(
+        'search/',
+        views.SearchView.as_view(),
+        name='search'
+    ),
     path(
         'category/<slug:category_slug>/',
         views.CategoryPostsListView.as_view(),
@@ -1,6 +1,10 @@
-from django.core.paginator import Paginator
+from urllib.parse import urlencode
+
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views.generic import (
     CreateView,
     DetailView,
@@ -12,19 +16,31 @@ from django.views.generic import (
 from django.conf import settings
 from .mixins import (
     CommentMixin,
+    PostImageMixin,
     PostMixin,
     OnlyAuthorMixin,
+    PostPaginationMixin,
     ReversePostDetailMixin,
     ReverseProfileMixin
 )
+from .cache import POST, POST_CARDS, cache_anonymous_page, post_cache_timeout
 from .models import Comment, Post, User
 from .forms import CommentForm, UserForm, PostForm
-from .query_utils import CategoryPage, get_posts
+from .pagination import CachedCountPaginator, paginate, paginate_comments
+from .query_utils import (
+    CategoryPage,
+    get_comments,
+    get_post_or_404,
+    get_posts,
+    get_profile_stats
+)
+from .search import search_posts
 
 
 class PostCreateView(
     PostMixin,
     LoginRequiredMixin,
+    PostImageMixin,
     ReverseProfileMixin,
     CreateView
 ):
@@ -36,35 +52,42 @@ class PostCreateView(
         return super().form_valid(form)
 
 
+@method_decorator(
+    cache_anonymous_page(
+        versions=(POST_CARDS, POST),
+        timeout=post_cache_timeout
+    ),
+    name='dispatch'
+)
 class PostDetailView(PostMixin, DetailView):
     template_name = 'blog/detail.html'
 
     def get_object(self):
-        post = get_object_or_404(
-            get_posts(), pk=self.kwargs['post_id'])
-        if post.author != self.request.user:
-            return get_object_or_404(
-                get_posts(filtred=True),
-                pk=self.kwargs['post_id']
-            )
-        return post
+        return get_post_or_404(self.request.user, self.kwargs['post_id'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.all()
+        context['comments'] = paginate_comments(
+            self.request,
+            get_comments(self.object.comments)
+        )
         return context
 
 
-class PostListView(PostMixin, ListView):
+@method_decorator(cache_anonymous_page, name='dispatch')
+class PostListView(PostMixin, PostPaginationMixin, ListView):
     template_name = 'blog/index.html'
-    paginate_by = settings.PAGINATE_BY
 
     def get_queryset(self):
-        return get_posts(filtred=True, annotated=True)
+        return get_posts(filtred=True, annotated=True, projected=True)
+
+    def get_count_key(self):
+        return 'index'
 
 
 class PostUpdateView(
+    PostImageMixin,
     PostMixin,
     OnlyAuthorMixin,
     ReversePostDetailMixin,
@@ -92,22 +115,52 @@ class ProfileUpdateView(LoginRequiredMixin, ReverseProfileMixin, UpdateView):
         return self.request.user
 
 
-class CategoryPostsListView(ListView):
+@method_decorator(cache_anonymous_page, name='dispatch')
+class CategoryPostsListView(PostPaginationMixin, ListView):
     model = Post
     template_name = 'blog/category.html'
-    paginate_by = settings.PAGINATE_BY
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data()
         context['category'] = CategoryPage.get_category(self)
         return context
 
+    def get_count_key(self):
+        return f'category:{CategoryPage.get_category(self).pk}'
+
     def get_queryset(self):
         return get_posts(
             manager=CategoryPage.get_category(self).posts,
             filtred=True,
-            annotated=True
+            annotated=True,
+            projected=True
+        )
+
+
+class SearchView(ListView):
+    """Поиск по опубликованным постам, от более подходящих"""
+
+    template_name = 'blog/search.html'
+    paginate_by = settings.PAGINATE_BY
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        return search_posts(
+            get_posts(filtred=True, projected=True),
+            self.query
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        page = CachedCountPaginator(queryset, page_size).get_page(
+            self.request.GET.get('page')
         )
+        return page.paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        context['paginator_query'] = urlencode({'q': self.query})
+        return context
 
 
 class CommentCreateView(
@@ -127,9 +180,39 @@ class CommentCreateView(
 
 
 class CommentListView(ListView):
+    """Следующие страницы комментариев: HTML-фрагмент или JSON"""
+
     model = Comment
     template_name = 'blog/comments.html'
-    paginate_by = settings.PAGINATE_BY
+    paginate_by = settings.COMMENTS_PAGINATE_BY
+
+    def get_queryset(self):
+        self.post_object = get_post_or_404(
+            self.request.user, self.kwargs['post_id']
+        )
+        return get_comments(self.post_object.comments)
+
+    def paginate_queryset(self, queryset, page_size):
+        page = paginate_comments(self.request, queryset, page_size)
+        return page.paginator, page, page.object_list, page.has_other_pages()
+
+    def render_to_response(self, context, **response_kwargs):
+        if self.request.GET.get('format') != 'json':
+            return super().render_to_response(context, **response_kwargs)
+        page = context['page_obj']
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created_at': comment.created_at,
+                }
+                for comment in page
+            ],
+            'next_cursor': page.next_cursor,
+            'previous_cursor': page.previous_cursor,
+        })
 
 
 class CommentUpdateView(
@@ -150,25 +233,39 @@ class CommentDeleteView(
     pass
 
 
+@cache_anonymous_page
 def profile(request, username):
     template_name = 'blog/profile.html'
     profile = get_object_or_404(
-        User,
+        User.objects.select_related('profile_stats'),
         username=username
     )
-
+    stats = get_profile_stats(profile)
+
+    filtred = request.user != profile
+    if not filtred:
+        count = stats.post_count
+    elif stats.last_post_at is None or stats.last_post_at <= timezone.now():
+        count = stats.published_count
+    else:
+        # Отложенные публикации в счётчике уже есть, а в ленте ещё нет.
+        count = None
     posts = get_posts(
         manager=profile.posts,
-        filtred=(request.user != profile),
-        annotated=True
+        filtred=filtred,
+        annotated=True,
+        projected=True
     )
 
-    paginator = Paginator(posts, settings.PAGINATE_BY)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(
+        request, posts, count_key=f'profile:{profile.pk}:{int(filtred)}',
+        count=count
+    )
 
     context = {
         'profile': profile,
+        'stats': stats,
+        'post_count': count,
         'page_obj': page_obj
     }
 
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -55,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.routers.ReplicaPinMiddleware',
 ]
 
 ROOT_URLCONF = 'blogicum.urls'
@@ -83,14 +85,91 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Подключение задаётся переменными окружения DB_*; по умолчанию SQLite.
+# Соединения постоянные: каждый поток воркера держит своё соединение
+# DB_CONN_MAX_AGE секунд, так что размер «пула» на воркер равен числу
+# его потоков. Для PostgreSQL общий пул — внешний (PgBouncer),
+# его адрес указывается в DB_HOST/DB_PORT.
+
+DB_ENGINE = os.getenv('DB_ENGINE', 'django.db.backends.sqlite3')
+
+if DB_ENGINE == 'django.db.backends.sqlite3':
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            # Сколько секунд ждать снятия блокировки записи (busy timeout)
+            'OPTIONS': {'timeout': int(os.getenv('DB_BUSY_TIMEOUT', 20))},
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': DB_ENGINE,
+            'NAME': os.getenv('DB_NAME', 'blogicum'),
+            'USER': os.getenv('DB_USER', ''),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', ''),
+            'PORT': os.getenv('DB_PORT', ''),
+        }
+    }
+
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+# Реплика для чтения лент анонимами: те же параметры, что у основной
+# базы, кроме заданных в DB_REPLICA_*. Локально это может быть
+# второй файл SQLite: DB_REPLICA_NAME=replica.sqlite3
+REPLICA_SETTINGS = {
+    key: os.getenv(f'DB_REPLICA_{key}')
+    for key in ('NAME', 'HOST', 'PORT')
+    if os.getenv(f'DB_REPLICA_{key}')
+}
+if REPLICA_SETTINGS:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        **REPLICA_SETTINGS,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['blog.routers.PrimaryReplicaRouter']
+
+# Сколько секунд после записи клиент читает только из основной базы:
+# верхняя оценка задержки репликации
+REPLICA_PIN_SECONDS = 5
+
+# Проверять постоянные соединения перед каждым запросом
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', '1') == '1'
+
+# PRAGMA для каждого нового соединения SQLite: WAL позволяет читать
+# во время записи, NORMAL в режиме WAL не теряет целостности
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Без внешнего сервера кэша используется память процесса.
+
+if os.getenv('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.getenv('MEMCACHED_LOCATION'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'blogicum',
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -148,3 +227,34 @@ EMAIL_FILE_PATH = Path.joinpath(BASE_DIR, 'sent_emails')
 LOGIN_REDIRECT_URL = 'blog:index'
 
 PAGINATE_BY = 10
+
+# Больше записей нумерованная пагинация не считает: последняя
+# страница не показывается, дальше листать курсором
+PAGINATOR_COUNT_LIMIT = 10000
+
+COMMENTS_PAGINATE_BY = 50
+
+# Время жизни кэша лент для анонимов, секунды
+FEED_CACHE_TIMEOUT = 60 * 5
+
+# Время жизни кэша страницы поста для анонимов, секунды
+POST_DETAIL_CACHE_TIMEOUT = 60 * 60
+
+# Потолок времени жизни страниц и фрагментов, которые сбрасываются
+# только сигналами, если кэш в памяти процесса и другие воркеры
+# о записи не узнают
+LOCAL_CACHE_TIMEOUT = 30
+
+# Как часто при кэше в памяти процесса перечитываются справочники
+# (категории, местоположения), секунды
+REGISTRY_RELOAD_INTERVAL = 5
+
+# Курсорная пагинация лент вместо нумерованной (без COUNT и OFFSET)
+CURSOR_PAGINATION = False
+
+# Движок поиска: fts5 (SQLite FTS5), terms (таблица PostTerm, любая база)
+# или auto — FTS5, если миграция смогла создать его таблицу
+SEARCH_BACKEND = 'auto'
+
+# Время жизни фрагментного кэша карточек постов, секунды
+POST_CARD_CACHE_TIMEOUT = 60 * 60
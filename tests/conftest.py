@@ -1,3 +1,4 @@
+import json
 import os
 import re
 import time
@@ -29,6 +30,10 @@ from mixer.backend.django import mixer as _mixer
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
 COMMENT_TEXT_DISPLAY_LEN_FOR_TESTS = 50
+# Бюджеты маршрутов для test_budgets: верхние границы запросов и времени.
+BUDGETS = json.loads(
+    (Path(__file__).parent / "budgets.json").read_text(encoding="utf-8")
+)
 
 KeyVal = NamedTuple("KeyVal", [("key", Optional[str]), ("val", Optional[str])])
 UrlRepr = NamedTuple("UrlRepr", [("url", str), ("repr", str)])
@@ -0,0 +1,182 @@
+"""
+Бюджеты запросов и времени для всех именованных маршрутов.
+
+Размер набора данных задаётся переменной окружения BENCH_POSTS
+(по умолчанию 10; для нагрузочных прогонов — 10000 или 1000000).
+Бюджеты лежат в budgets.json по размерам набора, отдельно для автора
+и для анонима; для размера без бюджетов маршруты только измеряются.
+Маршруты, которые аноним не видит (редирект на вход), для него
+не меряются. Если задана BENCH_REPORT,
+замеры дописываются в этот файл построчно в JSON.
+"""
+import json
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.client import Client
+from django.urls import URLResolver, reverse
+from django.utils import timezone
+
+import blog.urls
+import pages.urls
+from blog.models import Category, Comment, Location, Post, make_excerpt
+from blog.query_utils import recount_comments, recount_profile_stats
+from blog.search import get_backend, reindex
+from blog.registry import warm_up
+from conftest import BUDGETS
+
+BENCH_POSTS = int(os.getenv("BENCH_POSTS", "10"))
+BENCH_REPORT = os.getenv("BENCH_REPORT")
+BATCH_SIZE = 5000
+
+
+def iter_routes(patterns, namespace):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, namespace)
+        elif pattern.name:
+            yield f"{namespace}:{pattern.name}", pattern
+
+
+ROUTES = dict(
+    list(iter_routes(blog.urls.urlpatterns, blog.urls.app_name))
+    + list(iter_routes(pages.urls.urlpatterns, pages.urls.app_name))
+)
+
+
+@pytest.fixture(scope="module")
+def bench_data(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        author = get_user_model().objects.create_user(
+            "bench_author", password="bench_password"
+        )
+        category = Category.objects.create(
+            title="Категория", slug="bench", description="Описание"
+        )
+        location = Location.objects.create(name="Место")
+        now = timezone.now()
+        text = "Текст публикации. " * 50
+        for start in range(0, BENCH_POSTS, BATCH_SIZE):
+            Post.objects.bulk_create(
+                Post(
+                    title=f"Публикация {i}",
+                    text=text,
+                    excerpt=make_excerpt(text),
+                    pub_date=now - timedelta(minutes=i),
+                    author=author,
+                    category=category,
+                    location=location,
+                )
+                for i in range(start, min(start + BATCH_SIZE, BENCH_POSTS))
+            )
+        post = Post.objects.filter(author=author).first()
+        Comment.objects.bulk_create(
+            Comment(text=f"Комментарий {i}", post=post, author=author)
+            for i in range(10)
+        )
+        recount_comments(Post.objects.filter(pk=post.pk))
+        recount_profile_stats(get_user_model().objects.filter(pk=author.pk))
+        reindex(Post.objects.filter(author=author))
+        yield {
+            "author": author,
+            "category": category,
+            "post": post,
+            "comment": post.comments.first(),
+        }
+        # Без сбора объектов в память: на миллионе постов это важно.
+        Comment.objects.filter(author=author)._raw_delete(Comment.objects.db)
+        post_ids = list(
+            Post.objects.filter(author=author).values_list("pk", flat=True)
+        )
+        for start in range(0, len(post_ids), BATCH_SIZE):
+            get_backend().remove(post_ids[start:start + BATCH_SIZE])
+        Post.objects.filter(author=author)._raw_delete(Post.objects.db)
+        author.delete()
+        category.delete()
+        location.delete()
+
+
+def route_kwargs(pattern, data):
+    values = {
+        "post_id": data["post"].id,
+        "comment_id": data["comment"].id,
+        "category_slug": data["category"].slug,
+        "username": data["author"].username,
+    }
+    return {name: values[name] for name in pattern.pattern.converters}
+
+
+class QueryTimer:
+    """Считает запросы и их суммарное время с точностью perf_counter."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def measure(client, route, url, visitor):
+    request = BUDGETS["requests"].get(route, {})
+    method = getattr(client, request.get("method", "get"))
+    cache.clear()
+    # Реестры справочников живут весь процесс: меряем с уже загруженным.
+    warm_up()
+    timer = QueryTimer()
+    with connection.execute_wrapper(timer):
+        started = time.perf_counter()
+        response = method(url, request.get("data", {}))
+        total = time.perf_counter() - started
+    sql = timer.seconds
+    return response, {
+        "route": route,
+        "visitor": visitor,
+        "posts": BENCH_POSTS,
+        "queries": timer.count,
+        "sql_ms": round(sql * 1000, 2),
+        "render_ms": round((total - sql) * 1000, 2),
+        "total_ms": round(total * 1000, 2),
+    }
+
+
+@pytest.mark.parametrize("visitor", ("author", "anonymous"))
+@pytest.mark.parametrize("route", sorted(ROUTES))
+def test_route_budget(route, visitor, bench_data, db):
+    client = Client()
+    if visitor == "author":
+        client.force_login(bench_data["author"])
+    url = reverse(route, kwargs=route_kwargs(ROUTES[route], bench_data))
+    response, result = measure(client, route, url, visitor)
+    assert response.status_code < 400, (
+        f"Маршрут {route} ответил {response.status_code}."
+    )
+    if visitor == "anonymous" and response.status_code == 302:
+        pytest.skip(f"Маршрут {route} недоступен анониму.")
+    if BENCH_REPORT:
+        with open(BENCH_REPORT, "a", encoding="utf-8") as report:
+            report.write(json.dumps(result) + "\n")
+
+    budgets = BUDGETS["budgets"].get(str(BENCH_POSTS))
+    if budgets is None:
+        pytest.skip(f"Нет бюджетов для {BENCH_POSTS} постов: {result}")
+    budgets = budgets[visitor]
+    assert route in budgets, (
+        f"Добавьте бюджет для маршрута {route} ({visitor})"
+        " в tests/budgets.json."
+    )
+    for metric in ("queries", "sql_ms", "total_ms"):
+        assert result[metric] <= budgets[route][metric], (
+            f"Маршрут {route} ({visitor}) превысил бюджет {metric}: "
+            f"{result[metric]} > {budgets[route][metric]}. {result}"
+        )
@@ -0,0 +1,34 @@
+import pytest
+from django.core.management import call_command
+
+from blog.models import Post
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(mixer, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что при создании комментария счётчик"
+        " комментариев публикации увеличивается."
+    )
+    comments[0].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при удалении комментария счётчик"
+        " комментариев публикации уменьшается."
+    )
+
+
+@pytest.mark.django_db
+def test_recount_comments_repairs_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=42)
+    call_command("recount_comments")
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что команда recount_comments исправляет"
+        " разошедшиеся счётчики комментариев."
+    )
@@ -0,0 +1,62 @@
+import base64
+
+import pytest
+from django.conf import settings
+
+
+@pytest.fixture
+def many_comments(mixer, post_with_published_location):
+    return mixer.cycle(settings.COMMENTS_PAGINATE_BY + 5).blend(
+        "blog.Comment", post=post_with_published_location
+    )
+
+
+@pytest.mark.django_db
+def test_detail_paginates_comments(client, many_comments):
+    post = many_comments[0].post
+    response = client.get(f"/posts/{post.id}/")
+    page = response.context["comments"]
+    assert len(page) == settings.COMMENTS_PAGINATE_BY, (
+        "Убедитесь, что на странице поста выводится ограниченное"
+        " число комментариев."
+    )
+    assert page.has_next()
+
+    fragment = client.get(
+        f"/posts/{post.id}/comments/", {"cursor": page.next_cursor}
+    )
+    assert fragment.status_code == 200
+    rest = list(fragment.context["page_obj"])
+    assert [c.id for c in page] + [c.id for c in rest] == [
+        c.id for c in sorted(many_comments, key=lambda c: (c.created_at, c.id))
+    ], "Убедитесь, что следующие комментарии подгружаются по курсору."
+    assert "<html" not in fragment.content.decode("utf-8")
+
+    data = client.get(
+        f"/posts/{post.id}/comments/",
+        {"cursor": page.next_cursor, "format": "json"},
+    ).json()
+    assert [c["id"] for c in data["comments"]] == [c.id for c in rest]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.django_db
+def test_comments_of_hidden_post(client, mixer, user):
+    post = mixer.blend("blog.Post", author=user, is_published=False)
+    assert client.get(f"/posts/{post.id}/comments/").status_code == 404
+
+
+@pytest.mark.django_db
+def test_comments_broken_cursor(client, many_comments):
+    post = many_comments[0].post
+    forged = base64.urlsafe_b64encode(
+        b'[0, ["2020-01-01T00:00:00+00:00", 1' + b"0" * 30 + b"]]"
+    ).decode()
+    for url, params in (
+        (f"/posts/{post.id}/", {"cursor": forged}),
+        (f"/posts/{post.id}/comments/", {"cursor": forged}),
+        (f"/posts/{post.id}/comments/", {"cursor": forged, "format": "json"}),
+    ):
+        assert client.get(url, params).status_code == 200, (
+            "Убедитесь, что подделанный курсор комментариев считается битым."
+        )
@@ -0,0 +1,40 @@
+import pytest
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+
+from blog.db import close_if_unusable
+
+
+@pytest.fixture
+def file_connection(tmp_path, django_db_blocker):
+    settings_dict = {
+        **connection.settings_dict, "NAME": str(tmp_path / "db.sqlite3")
+    }
+    wrapper = DatabaseWrapper(settings_dict, alias="file")
+    with django_db_blocker.unblock():
+        yield wrapper
+        wrapper.close()
+
+
+def _pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f"PRAGMA {name}")
+        return cursor.fetchone()[0]
+
+
+def test_sqlite_is_tuned_on_connect(file_connection):
+    assert _pragma(file_connection, "journal_mode") == "wal", (
+        "Убедитесь, что соединения SQLite переводятся в режим WAL."
+    )
+    assert _pragma(file_connection, "synchronous") == 1
+    assert _pragma(file_connection, "mmap_size") > 0
+
+
+def test_unusable_connection_is_closed(file_connection, monkeypatch):
+    file_connection.ensure_connection()
+    assert not close_if_unusable(file_connection)
+    monkeypatch.setattr(file_connection, "is_usable", lambda: False)
+    assert close_if_unusable(file_connection), (
+        "Убедитесь, что отвалившееся постоянное соединение закрывается."
+    )
+    assert file_connection.connection is None
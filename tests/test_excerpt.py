@@ -0,0 +1,72 @@
+import json
+import os
+import time
+import tracemalloc
+
+import pytest
+from django.core.management import call_command
+from django.template.defaultfilters import truncatewords
+
+from blog.models import Post
+from blog.query_utils import get_posts
+from blog.registry import warm_up
+
+BENCH_REPORT = os.getenv("BENCH_REPORT")
+LONG_TEXT = "Очень длинный текст публикации. " * 4000
+
+
+@pytest.mark.django_db
+def test_excerpt_follows_text(post_with_published_location):
+    post = post_with_published_location
+    post.text = LONG_TEXT
+    post.save()
+    post.refresh_from_db()
+    assert post.excerpt == truncatewords(LONG_TEXT, 10), (
+        "Убедитесь, что анонс поста совпадает с первыми десятью словами"
+        " текста и обновляется при сохранении."
+    )
+
+    Post.objects.filter(pk=post.pk).update(excerpt="")
+    call_command("fill_excerpts")
+    post.refresh_from_db()
+    assert post.excerpt == truncatewords(LONG_TEXT, 10), (
+        "Убедитесь, что команда fill_excerpts заполняет пустые анонсы."
+    )
+
+
+def _measure(queryset):
+    tracemalloc.start()
+    started = time.perf_counter()
+    posts = list(queryset)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return posts, peak, elapsed
+
+
+@pytest.mark.django_db
+def test_feed_with_long_posts_skips_text(mixer, user, published_category):
+    mixer.cycle(20).blend(
+        "blog.Post", author=user, category=published_category,
+        text=LONG_TEXT,
+    )
+    warm_up()
+    _, full_peak, full_time = _measure(get_posts(annotated=True))
+    posts, card_peak, card_time = _measure(
+        get_posts(annotated=True, projected=True)
+    )
+    result = {
+        "bench": "feed_long_posts",
+        "full_kb": full_peak // 1024,
+        "cards_kb": card_peak // 1024,
+        "full_ms": round(full_time * 1000, 2),
+        "cards_ms": round(card_time * 1000, 2),
+    }
+    if BENCH_REPORT:
+        with open(BENCH_REPORT, "a", encoding="utf-8") as report:
+            report.write(json.dumps(result) + "\n")
+    assert all(post.excerpt for post in posts)
+    assert card_peak * 10 < full_peak, (
+        "Убедитесь, что лента с анонсами не загружает полные тексты"
+        f" публикаций: {result}"
+    )
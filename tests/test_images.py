@@ -0,0 +1,152 @@
+import re
+from io import BytesIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from PIL import Image
+
+from blog import jobs
+from blog.images import RENDITIONS, make_renditions, strip_metadata
+from blog.jobs import enqueue_image_job
+from blog.models import ImageJob, Post, PostPhoto
+
+
+@pytest.mark.django_db
+def test_make_renditions(client, post_with_published_location):
+    post = post_with_published_location
+    make_renditions(post)
+    photo = PostPhoto.objects.get(post=post)
+    for field_name in RENDITIONS:
+        rendition = getattr(photo, field_name)
+        assert rendition, (
+            f"Убедитесь, что для фото поста создаётся копия `{field_name}`."
+        )
+        with rendition.open("rb"):
+            assert Image.open(rendition).format == "JPEG"
+
+    assert (photo.width, photo.height) == (100, 100), (
+        "Убедитесь, что размеры фото сохраняются при обработке."
+    )
+    assert re.fullmatch(r"#[0-9a-f]{6}", photo.color)
+
+    content = client.get("/").content.decode("utf-8")
+    assert photo.thumbnail.url in content, (
+        "Убедитесь, что в ленте выводится уменьшенная копия фото."
+    )
+    assert "srcset=" in content
+    assert 'width="100" height="100"' in content, (
+        "Убедитесь, что карточка поста выводит размеры фото."
+    )
+
+
+def _jpeg_with_exif(size, orientation=None):
+    exif = Image.Exif()
+    exif[0x0110] = "Camera"
+    if orientation is not None:
+        exif[0x0112] = orientation
+    image = Image.new("RGB", size)
+    image.paste((200, 30, 30), (0, 0, size[0] // 2, size[1]))
+    data = BytesIO()
+    image.save(data, "JPEG", exif=exif, quality=90)
+    return data.getvalue()
+
+
+@pytest.mark.django_db
+def test_strip_metadata_keeps_quality(post_with_published_location):
+    post = post_with_published_location
+    data = _jpeg_with_exif((60, 40))
+    post.image.save("exif.jpg", ContentFile(data), save=False)
+    strip_metadata(post)
+    with post.image.open("rb"):
+        stripped = Image.open(BytesIO(post.image.read()))
+        assert not stripped.getexif()
+        assert stripped.tobytes() == Image.open(BytesIO(data)).tobytes(), (
+            "Убедитесь, что без поворота EXIF удаляется без перекодирования."
+        )
+
+    post.image.save(
+        "rotated.jpg", ContentFile(_jpeg_with_exif((60, 40), 6)), save=False
+    )
+    strip_metadata(post)
+    with post.image.open("rb"):
+        rotated = Image.open(post.image)
+        assert rotated.size == (40, 60)
+        assert not rotated.getexif()
+
+
+@pytest.mark.django_db
+def test_renditions_deleted_with_post(
+        user_client, post_with_published_location,
+        django_capture_on_commit_callbacks):
+    post = post_with_published_location
+    make_renditions(post)
+    photo = PostPhoto.objects.get(post=post)
+    renditions = [getattr(photo, field_name) for field_name in RENDITIONS]
+    with django_capture_on_commit_callbacks(execute=True):
+        response = user_client.post(f"/posts/{post.id}/delete/")
+    assert response.status_code == 302
+    for rendition in renditions:
+        assert not rendition.storage.exists(rendition.name), (
+            "Убедитесь, что при удалении поста удаляются копии его фото."
+        )
+
+
+@pytest.mark.django_db
+def test_upload_is_processed_by_queue(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    exif = Image.Exif()
+    exif[0x0110] = "Camera"
+    image_data = BytesIO()
+    Image.new("RGB", (100, 100)).save(image_data, "JPEG", exif=exif)
+    response = user_client.post(f"/posts/{post.id}/edit/", {
+        "title": post.title,
+        "text": post.text,
+        "pub_date": post.pub_date.strftime("%Y-%m-%dT%H:%M"),
+        "category": post.category_id,
+        "image": SimpleUploadedFile(
+            "upload.jpg", image_data.getvalue(), "image/jpeg"
+        ),
+    })
+    assert response.status_code == 302
+    assert not PostPhoto.objects.filter(post=post).exists(), (
+        "Убедитесь, что фото обрабатывается вне запроса."
+    )
+    job = ImageJob.objects.get(post=post)
+    assert job.status == ImageJob.PENDING
+
+    call_command("process_image_jobs", once=True)
+    job.refresh_from_db()
+    assert job.status == ImageJob.DONE, job.error
+    assert PostPhoto.objects.filter(post=post).exists()
+    post.refresh_from_db()
+    with post.image.open("rb"):
+        assert not Image.open(post.image).getexif(), (
+            "Убедитесь, что из оригинала фото удаляются EXIF-данные."
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_job_of_deleted_post(
+        mixer, monkeypatch, post_with_published_location):
+    post = post_with_published_location
+    enqueue_image_job(post)
+
+    def delete_post(post):
+        Post.objects.filter(pk=post.pk).delete()
+
+    monkeypatch.setattr(jobs, "strip_metadata", delete_post)
+    call_command("process_image_jobs", once=True)
+    assert not ImageJob.objects.exists()
+
+    post = mixer.blend(
+        "blog.Post", author=post.author, image="post_images/gone.jpg"
+    )
+    enqueue_image_job(post)
+    job = jobs.claim_next_job()
+    Post.objects.filter(pk=post.pk).delete()
+    assert jobs.run_job(job, max_attempts=3) == ImageJob.DONE, (
+        "Убедитесь, что задача удалённого поста не останавливает очередь."
+    )
@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Category, Comment, Location, Post
+
+DB_JSON = Path(__file__).resolve().parent.parent / "db.json"
+
+
+@pytest.mark.django_db
+def test_import_blog_data(tmp_path):
+    records = json.loads(DB_JSON.read_text(encoding="utf-8"))
+    posts = [r for r in records if r["model"] == "blog.post"]
+
+    call_command("import_blog_data", str(DB_JSON), batch_size=7)
+    assert Post.objects.count() == len(posts)
+    assert Category.objects.count() == sum(
+        r["model"] == "blog.category" for r in records)
+    first = posts[0]
+    post = Post.objects.get(title=first["fields"]["title"])
+    assert post.author.username == next(
+        r["fields"]["username"] for r in records
+        if r["model"] == "auth.user" and r["pk"] == first["fields"]["author"]
+    ), "Убедитесь, что ссылки на авторов переносятся через карту ключей."
+
+    comments = tmp_path / "comments.jsonl"
+    comments.write_text("\n".join(json.dumps({
+        "model": "blog.comment",
+        "pk": i,
+        "fields": {
+            "text": f"Комментарий {i}",
+            "post": post.pk,
+            "author": post.author_id,
+            "created_at": "2020-01-01T00:00:00Z",
+        },
+    }) for i in range(3)), encoding="utf-8")
+    call_command("import_blog_data", str(comments), "--keep-ids")
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что после загрузки пересчитываются счётчики"
+        " комментариев."
+    )
+    assert Comment.objects.filter(created_at__year=2020).count() == 3, (
+        "Убедитесь, что дата создания берётся из дампа."
+    )
+
+    locations = Location.objects.count()
+    call_command("import_blog_data", str(DB_JSON))
+    assert Post.objects.count() == 2 * len(posts)
+    assert Location.objects.count() == 2 * locations
+    assert Category.objects.count() == sum(
+        r["model"] == "blog.category" for r in records
+    ), "Убедитесь, что категории с тем же slug не дублируются."
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("options", [{}, {"gzip": True, "shard": True}])
+def test_export_import_round_trip(tmp_path, mixer, options):
+    call_command("import_blog_data", str(DB_JSON))
+    post = Post.objects.exclude(category=None).first()
+    mixer.cycle(2).blend("blog.Comment", post=post, author=post.author)
+    expected = list(
+        Post.objects.order_by("pk").values_list(
+            "pk", "title", "pub_date", "author__username",
+            "category__slug", "location__name", "comment_count")
+    )
+
+    target = tmp_path / ("dump" if options else "dump.jsonl")
+    call_command("export_blog_data", str(target), **options)
+    if not options:
+        users = [
+            record["fields"]
+            for record in map(json.loads, target.read_text().splitlines())
+            if record["model"] == "auth.user"
+        ]
+        assert users and all(
+            set(fields) == {"username", "first_name", "last_name"}
+            for fields in users
+        ), "Убедитесь, что у авторов не выгружаются личные данные."
+    if options:
+        assert (target / "blog.post.jsonl.gz").exists(), (
+            "Убедитесь, что при --shard каждая модель пишется"
+            " в отдельный файл."
+        )
+
+    Post.objects.all().delete()
+    Location.objects.all().delete()
+    call_command("import_blog_data", str(target), "--keep-ids")
+    actual = list(
+        Post.objects.order_by("pk").values_list(
+            "pk", "title", "pub_date", "author__username",
+            "category__slug", "location__name", "comment_count")
+    )
+    assert actual == expected, (
+        "Убедитесь, что выгрузка export_blog_data загружается обратно"
+        " без потерь."
+    )
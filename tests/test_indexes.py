@@ -0,0 +1,51 @@
+import pytest
+
+from blog.query_utils import get_posts
+
+
+def _plan(queryset):
+    return queryset.explain()
+
+
+@pytest.mark.django_db
+def test_index_feed_uses_published_index(many_posts_with_published_locations):
+    plan = _plan(get_posts(filtred=True, annotated=True)[:10])
+    assert "post_published_feed_idx" in plan, (
+        "Убедитесь, что запрос главной страницы использует индекс"
+        f" опубликованных постов. План запроса:\n{plan}"
+    )
+
+
+@pytest.mark.django_db
+def test_category_feed_uses_category_index(
+        published_category, many_posts_with_published_locations):
+    plan = _plan(get_posts(
+        manager=published_category.posts, filtred=True, annotated=True
+    )[:10])
+    assert "post_category_feed_idx" in plan, (
+        "Убедитесь, что запрос страницы категории использует индекс"
+        f" (category, pub_date). План запроса:\n{plan}"
+    )
+
+
+@pytest.mark.django_db
+def test_profile_feed_uses_author_index(
+        user, many_posts_with_published_locations):
+    for filtred in (True, False):
+        plan = _plan(get_posts(
+            manager=user.posts, filtred=filtred, annotated=True
+        )[:10])
+        assert "post_author_feed_idx" in plan, (
+            "Убедитесь, что запрос страницы профиля использует индекс"
+            f" (author, pub_date). План запроса:\n{plan}"
+        )
+
+
+@pytest.mark.django_db
+def test_comments_use_post_index(mixer, post_with_published_location):
+    mixer.cycle(3).blend("blog.Comment", post=post_with_published_location)
+    plan = _plan(post_with_published_location.comments.all())
+    assert "comment_post_created_idx" in plan, (
+        "Убедитесь, что комментарии поста выбираются по индексу"
+        f" (post, created_at). План запроса:\n{plan}"
+    )
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog.cache import feed_cache_timeout, post_cache_timeout
+from blog.registry import warm_up
+from blog.scheduling import next_publication
+
+
+@pytest.mark.django_db
+def test_anonymous_feed_is_cached(
+        client, user_client, django_assert_num_queries,
+        post_with_published_location):
+    post = post_with_published_location
+    for url in ("/", f"/category/{post.category.slug}/",
+                f"/profile/{post.author.username}/"):
+        client.get(url)
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert post.title in response.content.decode("utf-8"), (
+            f"Убедитесь, что страница {url} отдаётся анонимам из кэша."
+        )
+
+    assert "Написать пост" in user_client.get("/").content.decode("utf-8"), (
+        "Убедитесь, что авторизованным пользователям страница"
+        " не отдаётся из кэша."
+    )
+
+    post.title = "После сохранения"
+    post.save()
+    assert "После сохранения" in client.get("/").content.decode("utf-8"), (
+        "Убедитесь, что сохранение поста сбрасывает кэш лент."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_cache_expires_with_scheduled_post(settings, mixer, user):
+    settings.LOCAL_CACHE_TIMEOUT = settings.FEED_CACHE_TIMEOUT
+    mixer.blend(
+        "blog.Post", author=user,
+        pub_date=timezone.now() + timedelta(seconds=30),
+    )
+    assert 0 < feed_cache_timeout() <= 30, (
+        "Убедитесь, что кэш лент истекает к моменту публикации"
+        " ближайшего отложенного поста."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_cache_timeout_with_local_cache(settings, monkeypatch):
+    cache.clear()
+    assert feed_cache_timeout() == settings.LOCAL_CACHE_TIMEOUT, (
+        "Убедитесь, что с кэшем в памяти процесса ленты"
+        " кэшируются ненадолго."
+    )
+    monkeypatch.setattr("blog.cache.cache_is_shared", lambda: True)
+    assert feed_cache_timeout() == settings.FEED_CACHE_TIMEOUT
+
+
+@pytest.mark.django_db
+def test_schedule_registry(mixer, user, django_assert_num_queries):
+    soon = timezone.now() + timedelta(hours=1)
+    post = mixer.blend("blog.Post", author=user, pub_date=soon)
+    assert next_publication() == soon
+    with django_assert_num_queries(0):
+        assert next_publication() == soon, (
+            "Убедитесь, что дата ближайшей публикации берётся из кэша."
+        )
+
+    later = soon + timedelta(hours=1)
+    post.pub_date = later
+    post.save()
+    assert next_publication() == later, (
+        "Убедитесь, что изменение даты публикации сбрасывает расписание."
+    )
+
+
+@pytest.mark.django_db
+def test_anonymous_post_detail_is_cached(
+        client, django_assert_num_queries, mixer,
+        post_with_published_location):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    warm_up()
+    with django_assert_num_queries(2):
+        client.get(url)
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert post.title in response.content.decode("utf-8"), (
+        "Убедитесь, что страница поста отдаётся анонимам из кэша."
+    )
+
+    mixer.blend("blog.Comment", post=post, text="Свежий комментарий")
+    assert "Свежий комментарий" in client.get(url).content.decode("utf-8"), (
+        "Убедитесь, что новый комментарий сбрасывает кэш страницы поста."
+    )
+
+    post.is_published = False
+    post.save()
+    assert client.get(url).status_code == 404, (
+        "Убедитесь, что снятый с публикации пост не отдаётся из кэша."
+    )
+
+
+def test_post_cache_timeout_with_local_cache(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+        }
+    }
+    assert post_cache_timeout() == settings.LOCAL_CACHE_TIMEOUT, (
+        "Убедитесь, что с кэшем в памяти процесса страница поста"
+        " кэшируется ненадолго."
+    )
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.memcached."
+            "PyMemcacheCache"
+        }
+    }
+    assert post_cache_timeout() == settings.POST_DETAIL_CACHE_TIMEOUT
@@ -0,0 +1,145 @@
+import base64
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Post
+from blog.pagination import CachedCountPaginator
+from conftest import N_PER_PAGE
+
+
+@pytest.fixture
+def posts_with_same_dates(mixer, user, published_category):
+    now = timezone.now()
+    pub_dates = (
+        now - timedelta(days=i // 3)
+        for i in range(N_PER_PAGE * 2 + 5)
+    )
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        pub_date=pub_dates,
+    )
+
+
+def _walk(client, url, cursor_key):
+    seen = []
+    pages = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get(url, {"cursor": cursor})
+        page_obj = response.context["page_obj"]
+        pages.append(page_obj)
+        seen.extend(post.id for post in page_obj)
+        cursor = getattr(page_obj, cursor_key)
+    return seen, pages
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_walks_all_posts(client, posts_with_same_dates):
+    ordered = sorted(
+        posts_with_same_dates, key=lambda p: (p.pub_date, p.id), reverse=True
+    )
+    seen, pages = _walk(client, "/", "next_cursor")
+    assert seen == [post.id for post in ordered], (
+        "Убедитесь, что курсорная пагинация главной страницы выдаёт все"
+        " публикации ровно один раз в порядке «от новых к старым»."
+    )
+    assert [len(page) for page in pages] == [N_PER_PAGE, N_PER_PAGE, 5]
+    assert not pages[0].has_previous()
+
+    last = pages[-1]
+    response = client.get("/", {"cursor": last.previous_cursor})
+    assert [p.id for p in response.context["page_obj"]] == [
+        p.id for p in pages[-2]
+    ], "Убедитесь, что ссылка на предыдущую страницу ведёт на неё."
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_broken_cursor(client, posts_with_same_dates):
+    response = client.get("/", {"cursor": "not-a-cursor"})
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+    assert "?cursor=" in response.content.decode("utf-8")
+
+    forged = base64.urlsafe_b64encode(b"[0, [null, null]]").decode()
+    response = client.get("/", {"cursor": forged})
+    assert response.status_code == 200, (
+        "Убедитесь, что курсор с пустыми значениями считается битым."
+    )
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+    forged = base64.urlsafe_b64encode(
+        b'[0, ["2020-01-01T00:00:00+00:00", 1' + b"0" * 30 + b"]]"
+    ).decode()
+    response = client.get("/", {"cursor": forged})
+    assert response.status_code == 200, (
+        "Убедитесь, что курсор со слишком большим id считается битым."
+    )
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+
+
+@pytest.mark.django_db
+def test_feed_count_is_cached(
+        user_client, posts_with_same_dates, django_assert_num_queries):
+    user_client.get("/")
+    with django_assert_num_queries(3):
+        response = user_client.get("/", {"page": 2})
+    assert response.context["paginator"].count == len(posts_with_same_dates), (
+        "Убедитесь, что число постов в ленте берётся из кэша"
+        " без повторного COUNT."
+    )
+
+
+@pytest.mark.django_db
+def test_page_window(mixer, user):
+    mixer.cycle(12).blend("blog.Post", author=user)
+    page = CachedCountPaginator(Post.objects.order_by("id"), 1).get_page(6)
+    ellipsis = page.paginator.ELLIPSIS
+    assert page.page_window == [1, ellipsis, 4, 5, 6, 7, 8, ellipsis, 12], (
+        "Убедитесь, что пагинатор выводит окно страниц вокруг текущей."
+    )
+
+
+@pytest.mark.django_db
+def test_count_limit(client, settings, posts_with_same_dates):
+    settings.PAGINATOR_COUNT_LIMIT = N_PER_PAGE + 1
+    response = client.get("/")
+    paginator = response.context["paginator"]
+    assert paginator.count == N_PER_PAGE + 1
+    assert not paginator.count_exact
+    content = response.content.decode("utf-8")
+    assert "?page=2" in content and "Последняя" not in content, (
+        "Убедитесь, что при неизвестном числе постов ссылка на следующую"
+        " страницу есть, а на последнюю — нет."
+    )
+
+
+@pytest.mark.django_db
+def test_pages_beyond_count_limit(client, settings, mixer, user):
+    settings.PAGINATOR_COUNT_LIMIT = 20
+    mixer.cycle(35).blend(
+        "blog.Post", author=user, is_published=True,
+        category__is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    response = client.get("/", {"page": 2})
+    assert response.context["page_obj"].has_next()
+    assert "?page=3" in response.content.decode("utf-8"), (
+        "Убедитесь, что за пределом подсчёта постов есть ссылка"
+        " на следующую страницу."
+    )
+    page = client.get("/", {"page": 4}).context["page_obj"]
+    assert page.number == 4 and len(page) == 35 - 3 * N_PER_PAGE, (
+        "Убедитесь, что страницы за пределом подсчёта постов открываются."
+    )
+    assert not page.has_next()
+    assert client.get("/", {"page": 9}).context["page_obj"].number == 2
+    response = client.get("/", {"page": "1" + "0" * 30})
+    assert response.status_code == 200, (
+        "Убедитесь, что огромный номер страницы не приводит к ошибке."
+    )
+    assert response.context["page_obj"].number == 2
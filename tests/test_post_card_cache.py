@@ -0,0 +1,52 @@
+import pytest
+
+from blog.cache import post_card_cache_timeout
+from blog.models import Post
+
+
+@pytest.mark.django_db
+def test_post_card_is_cached_and_invalidated(
+        client, post_with_published_location):
+    post = post_with_published_location
+    assert post.title in client.get("/").content.decode("utf-8")
+
+    Post.objects.filter(pk=post.pk).update(title="Без сохранения")
+    content = client.get("/").content.decode("utf-8")
+    assert post.title in content, (
+        "Убедитесь, что карточка поста берётся из фрагментного кэша."
+    )
+
+    post.title = "Новый заголовок"
+    post.save()
+    content = client.get("/").content.decode("utf-8")
+    assert "Новый заголовок" in content, (
+        "Убедитесь, что после сохранения поста его карточка"
+        " рендерится заново."
+    )
+
+    category = post.category
+    category.title = "Новая категория"
+    category.save()
+    content = client.get("/").content.decode("utf-8")
+    assert "Новая категория" in content, (
+        "Убедитесь, что изменение категории сбрасывает кэш карточек."
+    )
+
+
+def test_post_card_cache_timeout_with_local_cache(settings):
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+        }
+    }
+    assert post_card_cache_timeout() == settings.LOCAL_CACHE_TIMEOUT, (
+        "Убедитесь, что с кэшем в памяти процесса карточки постов"
+        " кэшируются ненадолго."
+    )
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.memcached."
+            "PyMemcacheCache"
+        }
+    }
+    assert post_card_cache_timeout() == settings.POST_CARD_CACHE_TIMEOUT
@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import ProfileStats
+from blog.registry import warm_up
+
+
+def _stats(user):
+    return ProfileStats.objects.values(
+        "post_count", "published_count", "comment_count", "last_post_at"
+    ).get(user=user)
+
+
+@pytest.mark.django_db
+def test_stats_follow_writes(
+        mixer, user, another_user, published_category):
+    hidden = mixer.blend("blog.Category", is_published=False)
+    yesterday = timezone.now() - timedelta(days=1)
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=yesterday,
+    )
+    draft = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=False, pub_date=yesterday - timedelta(days=1),
+    )
+    mixer.cycle(3).blend("blog.Comment", post=post, author=another_user)
+    mixer.blend("blog.Comment", post=post, author=user)
+    mixer.blend("blog.Comment", post=draft, author=user)
+    assert _stats(user) == {
+        "post_count": 2,
+        "published_count": 1,
+        "comment_count": 2,
+        "last_post_at": yesterday,
+    }
+    assert _stats(another_user)["comment_count"] == 3
+
+    draft.is_published = True
+    draft.save()
+    post.category = hidden
+    post.save()
+    assert _stats(user)["published_count"] == 1, (
+        "Убедитесь, что счётчик опубликованных учитывает снятие"
+        " с публикации и скрытые категории."
+    )
+    post.delete()
+    assert _stats(user) == {
+        "post_count": 1,
+        "published_count": 1,
+        "comment_count": 1,
+        "last_post_at": draft.pub_date,
+    }, "Убедитесь, что удаление поста обновляет счётчики автора."
+    assert _stats(another_user)["comment_count"] == 0
+
+    published_category.is_published = False
+    published_category.save()
+    assert _stats(user)["published_count"] == 0, (
+        "Убедитесь, что скрытие категории пересчитывает профили авторов."
+    )
+
+    expected = {u.pk: _stats(u) for u in (user, another_user)}
+    ProfileStats.objects.all().delete()
+    call_command("recount_profile_stats")
+    assert {u.pk: _stats(u) for u in (user, another_user)} == expected, (
+        "Убедитесь, что пересчёт совпадает с обновлением по сигналам."
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("owner", (True, False))
+def test_profile_does_not_count(
+        owner, mixer, user, client, user_client, published_category):
+    mixer.cycle(12).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    cache.clear()
+    warm_up()
+    with CaptureQueriesContext(connection) as queries:
+        response = (user_client if owner else client).get(
+            f"/profile/{user.username}/"
+        )
+    assert response.context["page_obj"].paginator.count == 12
+    assert not [
+        query for query in queries if "COUNT(" in query["sql"]
+    ], "Убедитесь, что страница профиля берёт число постов из ProfileStats."
+
+
+@pytest.mark.django_db
+def test_profile_skips_deferred_posts(
+        mixer, user, client, published_category):
+    mixer.cycle(3).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+    )
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(days=1),
+    )
+    response = client.get(f"/profile/{user.username}/")
+    assert response.context["page_obj"].paginator.count == 3, (
+        "Убедитесь, что отложенные публикации не попадают"
+        " в число постов профиля для других пользователей."
+    )
@@ -0,0 +1,111 @@
+import pytest
+from django.core.cache import cache
+
+from blog.registry import warm_up
+
+from conftest import N_PER_PAGE
+
+
+@pytest.fixture
+def blog_data(mixer, user, published_category, published_locations):
+    posts = mixer.cycle(N_PER_PAGE + 5).blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        location=mixer.sequence(*published_locations),
+    )
+    post = posts[0]
+    comments = mixer.cycle(5).blend("blog.Comment", post=post, author=user)
+    cache.clear()
+    # Реестры справочников живут весь процесс: меряем с уже загруженным.
+    warm_up()
+    return post, comments[0]
+
+
+# Число SQL-запросов на страницу для авторизованного автора,
+# включая чтение сессии и пользователя. Кэш пуст, поэтому ленты
+# ещё считают посты и ищут ближайшую отложенную публикацию.
+# Числа точные: в budgets.json только верхние границы для test_budgets.
+QUERY_BUDGET = {
+    "index": 5,
+    "category_posts": 5,
+    "profile": 4,
+    "post_detail": 4,
+    "comments": 4,
+    "create_post": 4,
+    "edit_post": 5,
+    "delete_post": 4,
+    "edit_comment": 3,
+    "delete_comment": 3,
+    "edit_profile": 2,
+}
+
+
+def _urls(post, comment):
+    return {
+        "index": "/",
+        "category_posts": f"/category/{post.category.slug}/",
+        "profile": f"/profile/{post.author.username}/",
+        "post_detail": f"/posts/{post.id}/",
+        "comments": f"/posts/{post.id}/comments/",
+        "create_post": "/posts/create/",
+        "edit_post": f"/posts/{post.id}/edit/",
+        "delete_post": f"/posts/{post.id}/delete/",
+        "edit_comment": f"/posts/{post.id}/edit_comment/{comment.id}/",
+        "delete_comment": f"/posts/{post.id}/delete_comment/{comment.id}/",
+        "edit_profile": "/profile/edit/",
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", QUERY_BUDGET)
+def test_view_query_count(
+        name, user_client, blog_data, django_assert_num_queries):
+    url = _urls(*blog_data)[name]
+    with django_assert_num_queries(QUERY_BUDGET[name]):
+        response = user_client.get(url)
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_comments_do_not_query_authors(
+        mixer, client, blog_data, django_assert_num_queries):
+    post, _ = blog_data
+    mixer.cycle(20).blend("blog.Comment", post=post)
+    cache.clear()
+    warm_up()
+    with django_assert_num_queries(2):
+        client.get(f"/posts/{post.id}/")
+
+
+# POST-запросы на изменение: объект читается один раз, автор не читается.
+# Удаление поста дополнительно каскадно удаляет фото, задачи
+# и комментарии; счётчики авторов комментариев правятся одним
+# запросом. Изменение и удаление поста обновляют поисковый индекс
+# и счётчики профиля автора.
+WRITE_QUERY_BUDGET = {
+    "edit_post": 9,
+    "delete_post": 12,
+    "edit_comment": 4,
+    "delete_comment": 6,
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", WRITE_QUERY_BUDGET)
+def test_write_view_query_count(
+        name, user_client, blog_data, django_assert_num_queries):
+    post, comment = blog_data
+    data = {
+        "edit_post": {
+            "title": "Заголовок",
+            "text": "Текст",
+            "pub_date": "2020-01-01 10:00",
+            "category": post.category_id,
+        },
+        "edit_comment": {"text": "Текст"},
+    }.get(name, {})
+    with django_assert_num_queries(WRITE_QUERY_BUDGET[name]):
+        response = user_client.post(_urls(post, comment)[name], data)
+    assert response.status_code == 302
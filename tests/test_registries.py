@@ -0,0 +1,79 @@
+import pytest
+
+from blog.query_utils import get_posts
+from blog.registry import categories, warm_up
+
+
+@pytest.mark.django_db
+def test_registry_loads_once_and_follows_signals(
+        published_category, django_assert_num_queries):
+    assert categories.get_by_slug(published_category.slug).is_published
+    with django_assert_num_queries(0):
+        categories.get_by_slug(published_category.slug)
+        categories.unpublished_ids()
+
+    published_category.is_published = False
+    published_category.save()
+    assert not categories.get_by_slug(published_category.slug).is_published, (
+        "Убедитесь, что сохранение категории сбрасывает реестр категорий."
+    )
+    published_category.delete()
+    assert categories.get_by_slug(published_category.slug) is None
+
+
+@pytest.mark.django_db
+def test_feed_takes_categories_from_registry(
+        many_posts_with_published_locations, django_assert_num_queries):
+    warm_up()
+    with django_assert_num_queries(1):
+        posts = list(get_posts(filtred=True, annotated=True)[:10])
+        titles = [post.category.title for post in posts]
+    assert posts and all(titles), (
+        "Убедитесь, что категории постов в ленте берутся из реестра"
+        " без дополнительных запросов."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_is_projected_for_cards(
+        many_posts_with_published_locations, django_assert_num_queries):
+    warm_up()
+    with django_assert_num_queries(1):
+        posts = list(get_posts(
+            filtred=True, annotated=True, projected=True
+        )[:10])
+        names = [post.location.name for post in posts]
+    assert posts and all(names), (
+        "Убедитесь, что местоположения постов в ленте берутся из реестра"
+        " без дополнительных запросов."
+    )
+    assert "text" in posts[0].get_deferred_fields(), (
+        "Убедитесь, что лента не загружает полный текст постов."
+    )
+    assert posts[0].excerpt, (
+        "Убедитесь, что анонс поста заполняется при сохранении."
+    )
+
+    location = posts[0].location
+    location.name = "Новое место"
+    location.save()
+    post = get_posts(projected=True).get(pk=posts[0].pk)
+    assert post.location.name == "Новое место", (
+        "Убедитесь, что сохранение местоположения сбрасывает реестр."
+    )
+
+
+@pytest.mark.django_db
+def test_registry_reloads_with_local_cache(published_category, settings):
+    categories.get_by_slug(published_category.slug)
+    # Запись в другом процессе: сигналы этого процесса о ней не знают.
+    type(published_category).objects.filter(
+        pk=published_category.pk
+    ).update(is_published=False)
+    assert categories.get_by_slug(published_category.slug).is_published
+
+    settings.REGISTRY_RELOAD_INTERVAL = 0
+    assert not categories.get_by_slug(published_category.slug).is_published, (
+        "Убедитесь, что при кэше в памяти процесса реестр категорий"
+        " периодически перечитывается."
+    )
@@ -0,0 +1,88 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.utils import timezone
+
+from blog.models import Category, Post
+from blog.routers import PIN_COOKIE, REPLICA
+
+
+@pytest.fixture
+def replica(db, tmp_path):
+    """Вторая база SQLite в роли отстающей реплики."""
+    connections.databases[REPLICA] = {
+        **connections.databases["default"],
+        "NAME": str(tmp_path / "replica.sqlite3"),
+    }
+    call_command("migrate", database=REPLICA, verbosity=0)
+    author = get_user_model().objects.db_manager(REPLICA).create_user(
+        "replica_author"
+    )
+    category = Category.objects.using(REPLICA).create(
+        title="Категория", slug="replica", description="Описание"
+    )
+    Post.objects.using(REPLICA).create(
+        title="Пост из реплики", text="Текст", pub_date=timezone.now(),
+        author=author, category=category,
+    )
+    yield
+    connections[REPLICA].close()
+    del connections[REPLICA]
+    del connections.databases[REPLICA]
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_anonymous_feed_reads_replica(
+        replica, client, user_client, mixer, post_with_published_location):
+    cache.clear()
+    content = client.get("/").content.decode("utf-8")
+    assert "Пост из реплики" in content, (
+        "Убедитесь, что лента для анонимов читается из реплики."
+    )
+    content = user_client.get("/").content.decode("utf-8")
+    assert post_with_published_location.title in content, (
+        "Убедитесь, что авторизованные пользователи читают основную базу."
+    )
+
+    post = post_with_published_location
+    response = user_client.post(
+        f"/posts/{post.id}/comment", {"text": "Комментарий"}
+    )
+    assert response.cookies[PIN_COOKIE]["max-age"], (
+        "Убедитесь, что после записи клиент закрепляется за основной базой."
+    )
+    client.cookies[PIN_COOKIE] = "1"
+    cache.clear()
+    content = client.get("/").content.decode("utf-8")
+    assert post.title in content, (
+        "Убедитесь, что закреплённый клиент читает основную базу."
+    )
+
+
+@pytest.mark.django_db
+def test_reads_do_not_pin(client, post_with_published_location):
+    response = client.get(f"/posts/{post_with_published_location.id}/")
+    assert PIN_COOKIE not in response.cookies
+
+
+@pytest.mark.django_db
+def test_replica_pages_are_cached_briefly(
+        replica, client, settings, monkeypatch):
+    timeouts = []
+    cache_set = cache.set
+
+    def spy_set(key, value, timeout=None):
+        if key.startswith("blog:page:"):
+            timeouts.append(timeout)
+        cache_set(key, value, timeout)
+
+    monkeypatch.setattr(cache, "set", spy_set)
+    cache.clear()
+    client.get("/")
+    assert timeouts and max(timeouts) <= settings.REPLICA_PIN_SECONDS, (
+        "Убедитесь, что страница, собранная по реплике, кэшируется"
+        " не дольше задержки реплики."
+    )
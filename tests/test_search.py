@@ -0,0 +1,175 @@
+import json
+import os
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Q
+from django.utils import timezone
+
+from blog import search
+from blog.models import Post
+from blog.query_utils import get_posts
+
+BENCH_REPORT = os.getenv("BENCH_REPORT")
+BENCH_SEARCH_POSTS = int(os.getenv("BENCH_SEARCH_POSTS", "2000"))
+
+
+@pytest.fixture(params=["fts5", "terms"])
+def backend(request, settings, monkeypatch):
+    settings.SEARCH_BACKEND = request.param
+    monkeypatch.setattr(search, "_backends", {})
+    return request.param
+
+
+@pytest.mark.django_db
+def test_search_ranks_and_hides(backend, mixer, user, published_category):
+    def blend(**kwargs):
+        kwargs.setdefault("is_published", True)
+        kwargs.setdefault("pub_date", timezone.now())
+        return mixer.blend(
+            "blog.Post", author=user, category=published_category, **kwargs
+        )
+
+    in_text = blend(title="Заметка", text="Прогулка по лесу и озеру")
+    in_title = blend(title="Лесу посвящается", text="Текст")
+    blend(title="Лесу", text="Черновик", is_published=False)
+    blend(
+        title="Лесу", text="Будущее",
+        pub_date=timezone.now() + timedelta(days=1),
+    )
+    blend(title="Про море", text="Ничего общего")
+
+    found = list(search.search_posts(get_posts(filtred=True), "ЛЕСУ"))
+    assert found == [in_title, in_text], (
+        "Убедитесь, что поиск находит только видимые публикации"
+        " и ставит совпадение в заголовке выше совпадения в тексте."
+    )
+    assert list(
+        search.search_posts(get_posts(filtred=True), "лесу озеру")
+    ) == [in_text], "Убедитесь, что поиск требует все слова запроса."
+
+    in_text.text = "Теперь про горы"
+    in_text.save()
+    assert list(search.search_posts(Post.objects.all(), "горы")) == [in_text]
+    assert not search.search_posts(Post.objects.all(), "озеру").exists(), (
+        "Убедитесь, что индекс обновляется при изменении публикации."
+    )
+    in_title.delete()
+    assert not search.search_posts(Post.objects.all(), "посвящается").exists()
+
+
+@pytest.mark.django_db
+def test_search_matches_word_forms(backend, mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, title="Ёлки", text="Долгие прогулки по лесам."
+        " Running in the woods.",
+    )
+    assert post.text_stems == "долг прогулк по лес run in the wood"
+    for query in ("прогулка в лесу", "елка", "runs", "ДОЛГАЯ"):
+        assert list(search.search_posts(Post.objects.all(), query)) == [
+            post
+        ], (
+            "Убедитесь, что поиск находит публикацию по другим"
+            f" формам слов: «{query}»."
+        )
+
+
+@pytest.mark.django_db
+def test_reindex_command_in_parallel(backend, user, published_category):
+    Post.objects.bulk_create(
+        Post(
+            title=f"Заметка {i}", text=f"Путешествия номер {i}",
+            pub_date=timezone.now(), author=user,
+            category=published_category,
+        )
+        for i in range(30)
+    )
+    assert not search.search_posts(Post.objects.all(), "путешествие")
+    call_command("reindex_search", workers=2, batch_size=7)
+    assert search.search_posts(Post.objects.all(), "путешествие").count() == (
+        30
+    ), "Убедитесь, что reindex_search индексирует все публикации."
+    assert not Post.objects.filter(text_stems="").exists(), (
+        "Убедитесь, что reindex_search заполняет основы слов текста."
+    )
+
+
+@pytest.mark.django_db
+def test_search_total_is_cached(
+        settings, monkeypatch, mixer, user, published_category,
+        django_assert_num_queries):
+    settings.SEARCH_BACKEND = "terms"
+    monkeypatch.setattr(search, "_backends", {})
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, title="Искомая публикация",
+    )
+    queryset = get_posts(filtred=True)
+    list(search.search_posts(queryset, "искомая"))
+    with django_assert_num_queries(2):
+        assert list(search.search_posts(queryset, "искомая")), (
+            "Убедитесь, что число публикаций для ранжирования кэшируется."
+        )
+
+
+@pytest.mark.django_db
+def test_search_view(client, mixer, user, published_category):
+    mixer.cycle(12).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, title="Искомая публикация",
+    )
+    response = client.get("/search/", {"q": "искомая"})
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == 10
+    assert "?q=%D0%B8%D1%81%D0%BA%D0%BE%D0%BC%D0%B0%D1%8F&page=2" in (
+        response.content.decode("utf-8")
+    ), "Убедитесь, что ссылки пагинации сохраняют поисковый запрос."
+    assert not client.get("/search/").context["page_obj"].object_list
+
+
+@pytest.mark.django_db
+def test_search_benchmark_against_like(user, published_category):
+    now = timezone.now()
+    Post.objects.bulk_create(
+        Post(
+            title=f"Публикация {i}",
+            text="Обычный текст публикации про город и людей. " * 20
+            + ("редкоесловечко" if i % 500 == 0 else ""),
+            pub_date=now - timedelta(minutes=i),
+            author=user,
+            category=published_category,
+        )
+        for i in range(BENCH_SEARCH_POSTS)
+    )
+    search.reindex()
+    feed = get_posts(filtred=True)
+
+    started = time.perf_counter()
+    found = {post.pk for post in search.search_posts(feed, "редкоесловечко")}
+    indexed_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    scanned = {
+        post.pk for post in feed.filter(
+            Q(title__icontains="редкоесловечко")
+            | Q(text__icontains="редкоесловечко")
+        )
+    }
+    like_ms = (time.perf_counter() - started) * 1000
+
+    result = {
+        "bench": "search",
+        "posts": BENCH_SEARCH_POSTS,
+        "backend": type(search.get_backend()).__name__,
+        "index_ms": round(indexed_ms, 2),
+        "like_ms": round(like_ms, 2),
+    }
+    if BENCH_REPORT:
+        with open(BENCH_REPORT, "a", encoding="utf-8") as report:
+            report.write(json.dumps(result) + "\n")
+    assert found == scanned and found, (
+        "Убедитесь, что поиск по индексу находит то же, что и LIKE."
+        f" {result}"
+    )